@@ -11,51 +11,659 @@ Endpoints:
 - Error handling for product not found, invalid ID, etc.
 """
 
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+from flask import Flask, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from itertools import islice
 import sqlite3
 import logging
-from datetime import datetime
+import hashlib
+import hmac
+import os
+import queue
+import sys
+import threading
+import time
+import orjson
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (basicConfig runs only under `python app.py`; gunicorn
+# and other hosts keep their own logging setup)
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Route Flask's own JSON handling (jsonify, request.get_json) through orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend integration
+app.json = ORJSONProvider(app)
+
+# Enable CORS for frontend integration with fixed headers; the API is public
+# and never uses credentials, so there is no origin list to match
+@app.after_request
+def add_cors_headers(response):
+    """Allow any origin, and answer preflight requests for the API's methods"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        requested_headers = request.headers.get('Access-Control-Request-Headers')
+        if requested_headers:
+            response.headers['Access-Control-Allow-Headers'] = requested_headers
+    return response
+
+# Compress JSON responses (Brotli preferred, gzip fallback)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'deflate']
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+Compress(app)
+
+def jresp(obj, status=200):
+    """Serialize obj with orjson and wrap it in a JSON response"""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
 
 # Database configuration
 DATABASE_PATH = 'products.db'
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_STATEMENT_CACHE_SIZE = 256
 
-def get_db_connection():
-    """Create and return a database connection"""
+# Per-connection settings, applied once when a pooled connection is opened.
+# The API never writes through the pool (schema setup uses its own
+# connection), so pooled connections are made read-only last.
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA query_only=ON",
+]
+CONNECTION_INIT_SCRIPT = ";".join(CONNECTION_PRAGMAS) + ";"
+
+class ConnectionPool:
+    """Bounded pool of persistent SQLite connections shared by request threads"""
+
+    def __init__(self, db_path, size=DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._connections = None
+
+    def _open_connection(self):
+        """Open a connection and apply the per-connection settings"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=DB_STATEMENT_CACHE_SIZE
+        )
+        conn.executescript(CONNECTION_INIT_SCRIPT)
+        return conn
+
+    def fill(self):
+        """Open all connections if not already open (done once per process by init_process)"""
+        if self._connections is None:
+            connections = queue.Queue(maxsize=self.size)
+            for _ in range(self.size):
+                connections.put(self._open_connection())
+            self._connections = connections
+
+    def get(self):
+        """Borrow a connection, blocking until one is free"""
+        if self._connections is None:
+            self.fill()
+        return self._connections.get()
+
+    def put(self, conn):
+        """Return a borrowed connection to the pool"""
+        self._connections.put(conn)
+
+db_pool = ConnectionPool(DATABASE_PATH)
+
+# Indexes backing the product filters, ORDER BY id and GROUP BY queries.
+# products.id is a TEXT primary key rather than the rowid, so each filter
+# index carries id explicitly to hand rows back already in ORDER BY id order.
+INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category, id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_brand_id ON products(brand, id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_dept_id ON products(department_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_cat_brand_dept_id ON products(category, brand, department_id, id)",
+    # Superseded single-column indexes (prefixes of the ones above)
+    "DROP INDEX IF EXISTS idx_products_category",
+    "DROP INDEX IF EXISTS idx_products_brand",
+    "DROP INDEX IF EXISTS idx_products_department_id",
+]
+
+# Derived margin columns computed by SQLite instead of per row in Python.
+# ALTER TABLE can only add VIRTUAL generated columns; tables built from
+# database_schema.sql declare them STORED.
+DERIVED_COLUMNS = {
+    'profit_margin': "ALTER TABLE products ADD COLUMN profit_margin REAL GENERATED ALWAYS AS (retail_price - cost) VIRTUAL",
+    'profit_margin_percentage': "ALTER TABLE products ADD COLUMN profit_margin_percentage REAL GENERATED ALWAYS AS (round((retail_price - cost) / retail_price * 100, 2)) VIRTUAL",
+}
+
+# Distinct category and brand lookup tables kept in step with products by
+# triggers, so /api/categories and /api/brands read a few rows instead of
+# deduplicating the whole products table. Resynced on every startup because
+# rebuilding products (see the migration scripts) drops its triggers.
+LOOKUP_TABLE_STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS categories (name TEXT PRIMARY KEY) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS brands (name TEXT PRIMARY KEY) WITHOUT ROWID",
+    "INSERT OR IGNORE INTO categories (name) SELECT DISTINCT category FROM products",
+    "INSERT OR IGNORE INTO brands (name) SELECT DISTINCT brand FROM products",
+    "DELETE FROM categories WHERE name NOT IN (SELECT category FROM products)",
+    "DELETE FROM brands WHERE name NOT IN (SELECT brand FROM products)",
+    """CREATE TRIGGER IF NOT EXISTS products_lookup_ai AFTER INSERT ON products BEGIN
+        INSERT OR IGNORE INTO categories (name) VALUES (NEW.category);
+        INSERT OR IGNORE INTO brands (name) VALUES (NEW.brand);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_lookup_au AFTER UPDATE OF category, brand ON products BEGIN
+        INSERT OR IGNORE INTO categories (name) VALUES (NEW.category);
+        INSERT OR IGNORE INTO brands (name) VALUES (NEW.brand);
+        DELETE FROM categories WHERE name = OLD.category
+            AND NOT EXISTS (SELECT 1 FROM products WHERE category = OLD.category);
+        DELETE FROM brands WHERE name = OLD.brand
+            AND NOT EXISTS (SELECT 1 FROM products WHERE brand = OLD.brand);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_lookup_ad AFTER DELETE ON products BEGIN
+        DELETE FROM categories WHERE name = OLD.category
+            AND NOT EXISTS (SELECT 1 FROM products WHERE category = OLD.category);
+        DELETE FROM brands WHERE name = OLD.brand
+            AND NOT EXISTS (SELECT 1 FROM products WHERE brand = OLD.brand);
+    END""",
+    # Per-department product counts, so /api/departments reads a few rows
+    # instead of grouping every product on each request
+    "CREATE TABLE IF NOT EXISTS department_counts (department_id INTEGER PRIMARY KEY, product_count INTEGER NOT NULL)",
+    "DELETE FROM department_counts",
+    """INSERT INTO department_counts (department_id, product_count)
+        SELECT department_id, COUNT(*) FROM products WHERE department_id IS NOT NULL GROUP BY department_id""",
+    """CREATE TRIGGER IF NOT EXISTS products_dept_count_ai AFTER INSERT ON products BEGIN
+        INSERT INTO department_counts (department_id, product_count)
+            SELECT NEW.department_id, 1 WHERE NEW.department_id IS NOT NULL
+            ON CONFLICT (department_id) DO UPDATE SET product_count = product_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_dept_count_au AFTER UPDATE OF department_id ON products BEGIN
+        UPDATE department_counts SET product_count = product_count - 1 WHERE department_id = OLD.department_id;
+        INSERT INTO department_counts (department_id, product_count)
+            SELECT NEW.department_id, 1 WHERE NEW.department_id IS NOT NULL
+            ON CONFLICT (department_id) DO UPDATE SET product_count = product_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_dept_count_ad AFTER DELETE ON products BEGIN
+        UPDATE department_counts SET product_count = product_count - 1 WHERE department_id = OLD.department_id;
+    END""",
+]
+
+# Cache generation shared by every worker through the database. The flush
+# route bumps it; each worker compares it with the last value it saw and
+# drops its own caches when it moves
+CACHE_GENERATION_STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS cache_generation (id INTEGER PRIMARY KEY CHECK (id = 1), generation INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cache_generation (id, generation) VALUES (1, 0)",
+]
+SQL_CACHE_GENERATION = "SELECT generation FROM cache_generation"
+SQL_BUMP_CACHE_GENERATION = "UPDATE cache_generation SET generation = generation + 1 RETURNING generation"
+
+def ensure_indexes():
+    """
+    Add the derived margin columns, query indexes, category/brand lookup
+    tables and department counts if missing, then refresh planner statistics.
+    Uses its own short-lived connection so it is safe to call before the
+    server forks workers (the pool is only filled inside a worker).
+    """
     try:
         conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
-        return conn
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(products)")}
+            for column, statement in DERIVED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(statement)
+            for statement in INDEX_STATEMENTS + LOOKUP_TABLE_STATEMENTS + CACHE_GENERATION_STATEMENTS:
+                conn.execute(statement)
+            conn.execute("ANALYZE products")
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info("Database schema verified")
+        return True
+    except Exception as e:
+        logger.error("Failed to prepare database schema: %s", e)
+        return False
+
+@contextmanager
+def get_db_connection():
+    """Borrow a pooled database connection for the duration of a request"""
+    try:
+        conn = db_pool.get()
     except Exception as e:
-        logger.error(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
+        yield None
+        return
+    try:
+        yield conn
+    finally:
+        db_pool.put(conn)
+
+# Fixed SQL statements, kept as constants so every request reuses the same
+# text and hits the per-connection prepared statement cache
+# Explicit column list read by format_product / format_products
+SQL_PRODUCT_SELECT = """
+    SELECT p.id, p.name, p.brand, p.category, p.department_id, d.name as department_name,
+           p.cost, p.retail_price, p.sku, p.distribution_center_id,
+           p.profit_margin, p.profit_margin_percentage
+    FROM products p
+    LEFT JOIN departments d ON p.department_id = d.id
+"""
+
+SQL_GET_PRODUCT = SQL_PRODUCT_SELECT + "WHERE p.id = ?"
+
+SQL_DEPARTMENT_PRODUCTS = SQL_PRODUCT_SELECT + "WHERE 1=1"
+
+SQL_GET_DEPARTMENT_NAME = "SELECT name FROM departments WHERE id = ?"
+
+SQL_PRODUCTS_COUNT = """
+    SELECT COUNT(*)
+    FROM products p
+    LEFT JOIN departments d ON p.department_id = d.id
+    WHERE 1=1"""
+
+SQL_DEPARTMENTS_DETAILED = """
+    SELECT d.id, d.name, d.created_at, d.updated_at, COALESCE(c.product_count, 0) as product_count
+    FROM departments d
+    LEFT JOIN department_counts c ON c.department_id = d.id
+    ORDER BY d.name
+"""
+
+SQL_DEPARTMENTS = """
+    SELECT d.id, d.name, COALESCE(c.product_count, 0) as product_count
+    FROM departments d
+    LEFT JOIN department_counts c ON c.department_id = d.id
+    ORDER BY d.name
+"""
+
+SQL_GET_DEPARTMENT = """
+    SELECT d.id, d.name, d.created_at, d.updated_at, COALESCE(c.product_count, 0) as product_count
+    FROM departments d
+    LEFT JOIN department_counts c ON c.department_id = d.id
+    WHERE d.id = ?
+"""
+
+SQL_PRODUCT_STATS = """
+    SELECT COUNT(*),
+           COUNT(DISTINCT category),
+           COUNT(DISTINCT brand),
+           COUNT(DISTINCT department_id),
+           AVG(retail_price),
+           MIN(retail_price),
+           MAX(retail_price)
+    FROM products
+"""
+
+# Top 5 categories, brands and departments in one statement; each row is
+# tagged with its group and UNION ALL returns the groups in order
+SQL_TOP_GROUPS = """
+    SELECT * FROM (
+        SELECT 'category', category, COUNT(*) as count
+        FROM products
+        GROUP BY category
+        ORDER BY count DESC
+        LIMIT 5
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'brand', brand, COUNT(*) as count
+        FROM products
+        GROUP BY brand
+        ORDER BY count DESC
+        LIMIT 5
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'department', d.name, COUNT(*) as count
+        FROM products p
+        JOIN departments d ON p.department_id = d.id
+        GROUP BY d.id, d.name
+        ORDER BY count DESC
+        LIMIT 5
+    )
+"""
+
+# Product list rows rendered to JSON by SQLite. Raw prices use 17 significant
+# digits so they decode to exactly the stored doubles (json_object's default
+# rendering keeps only 15); the rounded percentage needs no more than 15.
+# printf renders NULL as 0.0, so NULLs (a zero retail_price leaves the
+# percentage NULL) are checked first and stay JSON null.
+SQL_PRODUCT_JSON_SELECT = """
+    SELECT p.id, json_object(
+        'id', p.id,
+        'name', p.name,
+        'brand', p.brand,
+        'category', p.category,
+        'department', json_object('id', p.department_id, 'name', d.name),
+        'cost', CASE WHEN p.cost IS NULL THEN NULL ELSE json(printf('%!.17g', p.cost)) END,
+        'retail_price', CASE WHEN p.retail_price IS NULL THEN NULL ELSE json(printf('%!.17g', p.retail_price)) END,
+        'sku', p.sku,
+        'distribution_center_id', CAST(p.distribution_center_id AS INTEGER),
+        'profit_margin', CASE WHEN p.profit_margin IS NULL THEN NULL ELSE json(printf('%!.17g', p.profit_margin)) END,
+        'profit_margin_percentage', CASE WHEN p.profit_margin_percentage IS NULL THEN NULL ELSE json(printf('%!.15g', p.profit_margin_percentage)) END
+    )
+    FROM products p
+    LEFT JOIN departments d ON p.department_id = d.id
+    WHERE 1=1
+"""
+
+SQL_CATEGORIES = "SELECT name FROM categories ORDER BY name"
+
+SQL_BRANDS = "SELECT name FROM brands ORDER BY name"
+
+# Product pages at least this large are streamed in batches of STREAM_BATCH_SIZE rows
+STREAM_MIN_LIMIT = 100
+STREAM_BATCH_SIZE = 32
+
+# Cached product counts expire after this many seconds
+COUNT_CACHE_TTL = 60
+
+# Cached response bodies expire after this many seconds
+RESPONSE_CACHE_TTL = 300
+
+# The stats snapshot is rechecked this often and rebuilt only if the database changed
+STATS_REFRESH_INTERVAL = 60
+
+# Each worker rereads the shared cache generation at most this often (seconds)
+CACHE_GENERATION_CHECK_INTERVAL = 1
+
+# Bumped by invalidate_caches() whenever product data changes
+_data_version = 0
+
+# Latest /api/products/stats payload and the database signature it was built from
+_stats_snapshot = None
+_stats_signature = None
+_stats_lock = None
+_stats_refresher_started = False
+
+# Cached JSON responses: key -> (etag, body, expires_at)
+_response_cache = {}
+
+# Last cache generation this worker saw, and when it last looked
+_cache_generation = None
+_cache_generation_checked_at = 0.0
+
+def invalidate_caches():
+    """Discard cached query results after a write to the products data"""
+    global _data_version, _stats_snapshot
+    _data_version += 1
+    _response_cache.clear()
+    _stats_snapshot = None
+
+def sync_cache_generation():
+    """Drop this worker's caches if a flush has bumped the shared cache generation"""
+    global _cache_generation, _cache_generation_checked_at
+    now = time.monotonic()
+    if now - _cache_generation_checked_at < CACHE_GENERATION_CHECK_INTERVAL:
+        return
+    _cache_generation_checked_at = now
+    with get_db_connection() as conn:
+        if not conn:
+            return
+        try:
+            generation = conn.execute(SQL_CACHE_GENERATION).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Failed to read cache generation: %s", e)
+            return
+    if _cache_generation is not None and generation != _cache_generation:
+        invalidate_caches()
+    _cache_generation = generation
+
+@app.before_request
+def check_cache_generation():
+    """Pick up flushes made through any worker before serving cached data"""
+    sync_cache_generation()
+
+def _etag_response(etag, body):
+    """Serve a cached body, or 304 Not Modified if the client already has it"""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+def cached_response(key):
+    """Return the cached response for key, or None if missing or expired"""
+    entry = _response_cache.get(key)
+    if entry is None or entry[2] <= time.monotonic():
         return None
+    etag, body, _ = entry
+    return _etag_response(etag, body)
+
+def cache_response(key, payload):
+    """Serialize payload, cache it under key with an ETag, and return the response"""
+    body = orjson.dumps(payload)
+    etag = hashlib.md5(body).hexdigest()
+    _response_cache[key] = (etag, body, time.monotonic() + RESPONSE_CACHE_TTL)
+    return _etag_response(etag, body)
+
+def compute_product_stats(conn):
+    """Run the aggregate queries behind /api/products/stats"""
+    cursor = conn.cursor()
+    
+    # Get basic stats in a single pass over products
+    cursor.execute(SQL_PRODUCT_STATS)
+    (total_products, total_categories, total_brands, total_departments,
+     avg_price, min_price, max_price) = cursor.fetchone()
+    
+    # Get top categories, brands and departments
+    top_categories, top_brands, top_departments = [], [], []
+    top_groups = {'category': top_categories, 'brand': top_brands, 'department': top_departments}
+    for group, name, count in cursor.execute(SQL_TOP_GROUPS):
+        top_groups[group].append({group: name, 'count': count})
+    
+    return {
+        'total_products': total_products,
+        'total_categories': total_categories,
+        'total_brands': total_brands,
+        'total_departments': total_departments,
+        'price_stats': {
+            'average_price': round(float(avg_price), 2),
+            'min_price': round(float(min_price), 2),
+            'max_price': round(float(max_price), 2)
+        },
+        'top_categories': top_categories,
+        'top_brands': top_brands,
+        'top_departments': top_departments
+    }
+
+def database_signature():
+    """
+    Identify the current database contents by file modification times.
+    Includes the WAL file, which changes on commit before a checkpoint
+    touches products.db, and the in-process data version.
+    """
+    signature = [_data_version]
+    for path in (DATABASE_PATH, DATABASE_PATH + '-wal'):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def refresh_stats_snapshot():
+    """Rebuild the stats snapshot if the database changed, and return it"""
+    global _stats_snapshot, _stats_signature
+    with _stats_lock, get_db_connection() as conn:
+        if not conn:
+            return _stats_snapshot
+        
+        # Read the signature with a connection open, since opening the first
+        # connection in WAL mode creates the -wal file
+        signature = database_signature()
+        if _stats_snapshot is not None and signature == _stats_signature:
+            return _stats_snapshot
+        
+        stats = compute_product_stats(conn)
+        
+        _stats_snapshot, _stats_signature = stats, signature
+        logger.info("Product stats snapshot refreshed")
+        return stats
+
+def _stats_refresher():
+    """Background loop keeping the stats snapshot in step with the database"""
+    while True:
+        time.sleep(STATS_REFRESH_INTERVAL)
+        try:
+            refresh_stats_snapshot()
+        except Exception as e:
+            logger.error("Failed to refresh stats snapshot: %s", e)
+
+def init_process():
+    """
+    Create this process's stats lock and fill its connection pool. Runs in
+    gunicorn's post_worker_init, after the gevent worker has monkey-patched,
+    so the lock and the pool's queue yield to other greenlets instead of
+    blocking the hub; app.run() callers get it before serving.
+    """
+    global _stats_lock
+    if _stats_lock is None:
+        _stats_lock = threading.Lock()
+    db_pool.fill()
+
+def start_stats_refresher():
+    """
+    Start the stats refresher once per process. Started on first use rather
+    than at import so each forked gunicorn worker runs its own thread.
+    """
+    global _stats_refresher_started
+    if _stats_refresher_started:
+        return
+    if _stats_lock is None:
+        init_process()
+    with _stats_lock:
+        if _stats_refresher_started:
+            return
+        threading.Thread(target=_stats_refresher, name='stats-refresher', daemon=True).start()
+        _stats_refresher_started = True
+
+@lru_cache(maxsize=64)
+def _filter_where(has_category, has_brand, has_department_id, has_department_name):
+    """Assemble the WHERE fragment for one filter shape (memoized)"""
+    where = ""
+    
+    if has_category:
+        where += " AND p.category = ?"
+    
+    if has_brand:
+        where += " AND p.brand = ?"
+        
+    if has_department_id:
+        where += " AND p.department_id = ?"
+        
+    if has_department_name:
+        where += " AND d.name = ?"
+    
+    return where
+
+def build_product_filters(category=None, brand=None, department_id=None, department_name=None):
+    """Build the WHERE fragment and parameters for the product list filters"""
+    where = _filter_where(bool(category), bool(brand), bool(department_id), bool(department_name))
+    params = [value for value in (category, brand, department_id, department_name) if value]
+    return where, params
+
+@lru_cache(maxsize=128)
+def page_sql(select, where, keyset):
+    """Assemble a full product page query, keyset or OFFSET paginated (memoized)"""
+    if keyset:
+        return select + where + " AND p.id > ? ORDER BY p.id LIMIT ?"
+    return select + where + " ORDER BY p.id LIMIT ? OFFSET ?"
+
+@lru_cache(maxsize=512)
+def _count_for(category, brand, department_id, department_name, version, ttl_bucket):
+    """Count the products matching a filter combination (memoized)"""
+    where, params = build_product_filters(category, brand, department_id, department_name)
+    with get_db_connection() as conn:
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        cursor = conn.execute(SQL_PRODUCTS_COUNT + where, params)
+        return cursor.fetchone()[0]
+
+def count_products(category=None, brand=None, department_id=None, department_name=None):
+    """Return the cached product count for a filter combination"""
+    ttl_bucket = int(time.monotonic() // COUNT_CACHE_TTL)
+    return _count_for(category, brand, department_id, department_name, _data_version, ttl_bucket)
 
 def format_product(row):
-    """Format a database row into a product dictionary"""
+    """Format a plain-tuple row in SQL_PRODUCT_SELECT column order into a product dictionary"""
+    (pid, name, brand, category, department_id, department_name, cost, retail_price,
+     sku, distribution_center_id, profit_margin, profit_margin_percentage) = row
     return {
-        'id': row['id'],
-        'name': row['name'],
-        'brand': row['brand'],
-        'category': row['category'],
+        'id': pid,
+        'name': name,
+        'brand': brand,
+        'category': category,
         'department': {
-            'id': row['department_id'],
-            'name': row['department_name']
+            'id': department_id,
+            'name': department_name
         },
-        'cost': float(row['cost']),
-        'retail_price': float(row['retail_price']),
-        'sku': row['sku'],
-        'distribution_center_id': int(row['distribution_center_id']),
-        'profit_margin': float(row['retail_price']) - float(row['cost']),
-        'profit_margin_percentage': round(((float(row['retail_price']) - float(row['cost'])) / float(row['retail_price']) * 100), 2)
+        'cost': cost,
+        'retail_price': retail_price,
+        'sku': sku,
+        'distribution_center_id': distribution_center_id,
+        'profit_margin': profit_margin,
+        'profit_margin_percentage': profit_margin_percentage
     }
 
+def format_products(rows, limit):
+    """Format up to limit plain-tuple rows in a single pass over the cursor"""
+    return list(map(format_product, islice(rows, max(limit, 0))))
+
+def stream_products_response(query, params, pagination, filters):
+    """
+    Stream a product page as JSON, sending the SQL-rendered rows in batches
+    of STREAM_BATCH_SIZE as they come off the cursor. The pooled connection stays borrowed until the response
+    is closed.
+    """
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(get_db_connection())
+        if not conn:
+            stack.close()
+            return jresp({'error': 'Database connection failed'}, 500)
+        
+        # Run the query up front so SQL errors still produce a 500
+        cursor = conn.execute(query, params)
+    except Exception:
+        stack.close()
+        raise
+    
+    def generate():
+        yield b'{"products":['
+        last_id = None
+        remaining = pagination['limit']
+        separator = b''
+        while remaining > 0:
+            batch = cursor.fetchmany(min(STREAM_BATCH_SIZE, remaining))
+            if not batch:
+                break
+            yield separator + ','.join(row[1] for row in batch).encode()
+            separator = b','
+            last_id = batch[-1][0]
+            remaining -= len(batch)
+        
+        if pagination['has_next'] is None:
+            pagination['has_next'] = cursor.fetchone() is not None
+        if pagination['has_next']:
+            pagination['next_cursor'] = last_id
+        yield b'],"pagination":' + orjson.dumps(pagination) + b',"filters":' + orjson.dumps(filters) + b'}'
+    
+    response = app.response_class(stream_with_context(generate()), mimetype='application/json')
+    response.call_on_close(stack.close)
+    return response
+
 @app.route('/api/products', methods=['GET'])
 def get_products():
     """
@@ -68,6 +676,7 @@ def get_products():
     - brand: Filter by brand
     - department_id: Filter by department ID
     - department_name: Filter by department name
+    - after_id: Return products after this ID (keyset pagination, use next_cursor)
     """
     try:
         # Get query parameters
@@ -77,116 +686,109 @@ def get_products():
         brand = request.args.get('brand')
         department_id = request.args.get('department_id', type=int)
         department_name = request.args.get('department_name')
+        after_id = request.args.get('after_id')
+        
+        # Reject a malformed department_id instead of silently dropping the filter
+        if department_id is None and request.args.get('department_id'):
+            return jresp({'error': 'Invalid department_id, must be an integer'}, 400)
         
         # Calculate offset
         offset = (page - 1) * limit
         
-        # Build query with JOIN to get department information
-        query = """
-            SELECT p.*, d.name as department_name 
-            FROM products p 
-            LEFT JOIN departments d ON p.department_id = d.id 
-            WHERE 1=1
-        """
-        params = []
-        
-        if category:
-            query += " AND p.category = ?"
-            params.append(category)
-        
-        if brand:
-            query += " AND p.brand = ?"
-            params.append(brand)
-            
-        if department_id:
-            query += " AND p.department_id = ?"
-            params.append(department_id)
-            
-        if department_name:
-            query += " AND d.name = ?"
-            params.append(department_name)
+        # Get total count (memoized per filter combination)
+        total_count = count_products(category, brand, department_id, department_name)
         
-        # Get total count
-        count_query = query.replace("SELECT p.*, d.name as department_name", "SELECT COUNT(*)")
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()[0]
+        # Build query; SQLite renders each product (with department) as JSON
+        where, params = build_product_filters(category, brand, department_id, department_name)
+        query = page_sql(SQL_PRODUCT_JSON_SELECT, where, after_id is not None)
         
         # Get paginated results
-        query += " ORDER BY p.id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Format products
-        products = [format_product(row) for row in rows]
+        if after_id is not None:
+            # Keyset pagination: seek past the cursor instead of skipping rows
+            params.extend([after_id, limit + 1])
+        else:
+            params.extend([limit, offset])
         
         # Calculate pagination info
         total_pages = (total_count + limit - 1) // limit
-        has_next = page < total_pages
-        has_prev = page > 1
+        if after_id is not None:
+            # Resolved from the extra row fetched past the page
+            has_next = None
+            has_prev = True
+        else:
+            has_next = page < total_pages
+            has_prev = page > 1
         
-        response = {
-            'products': products,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total_count': total_count,
-                'total_pages': total_pages,
-                'has_next': has_next,
-                'has_prev': has_prev
-            },
-            'filters': {
-                'category': category,
-                'brand': brand,
-                'department_id': department_id,
-                'department_name': department_name
-            }
+        pagination = {
+            'page': page,
+            'limit': limit,
+            'total_count': total_count,
+            'total_pages': total_pages,
+            'has_next': has_next,
+            'has_prev': has_prev,
+            'next_cursor': None
+        }
+        filters = {
+            'category': category,
+            'brand': brand,
+            'department_id': department_id,
+            'department_name': department_name
         }
         
-        conn.close()
-        return jsonify(response), 200
+        if limit >= STREAM_MIN_LIMIT:
+            return stream_products_response(query, params, pagination, filters)
+        
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
+            
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = list(islice(cursor, max(limit, 0)))
+        
+            if after_id is not None:
+                pagination['has_next'] = cursor.fetchone() is not None
+            if pagination['has_next'] and rows:
+                pagination['next_cursor'] = rows[-1][0]
+        
+            # Splice the SQL-rendered products into the response envelope
+            body = (
+                b'{"products":[' + ','.join(row[1] for row in rows).encode()
+                + b'],"pagination":' + orjson.dumps(pagination)
+                + b',"filters":' + orjson.dumps(filters) + b'}'
+            )
+            return app.response_class(body, status=200, mimetype='application/json')
         
     except Exception as e:
-        logger.error(f"Error in get_products: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_products: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
-@app.route('/api/products/<product_id>', methods=['GET'])
+@app.route('/api/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """
     GET /api/products/{id} - Get a specific product by ID
+    
+    Non-numeric IDs are rejected with a 404 by the route converter.
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
             
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.*, d.name as department_name 
-            FROM products p 
-            LEFT JOIN departments d ON p.department_id = d.id 
-            WHERE p.id = ?
-        """, (product_id,))
-        row = cursor.fetchone()
-        
-        if row is None:
-            conn.close()
-            return jsonify({'error': 'Product not found'}), 404
+            cursor = conn.cursor()
+            cursor.execute(SQL_GET_PRODUCT, (str(product_id),))  # products.id is stored as TEXT
+            row = cursor.fetchone()
+        
+            if row is None:
+                return jresp({'error': 'Product not found'}, 404)
         
-        product = format_product(row)
-        conn.close()
+            product = format_product(row)
         
-        return jsonify(product), 200
+            return jresp(product, 200)
         
     except Exception as e:
-        logger.error(f"Error in get_product: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_product: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/api/departments', methods=['GET'])
 def get_departments():
@@ -198,54 +800,44 @@ def get_departments():
     """
     try:
         include_details = request.args.get('include_details', 'false').lower() == 'true'
+        cache_key = f'departments:{include_details}'
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+        cached = cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
             
-        cursor = conn.cursor()
-        
-        if include_details:
-            # Include full details with timestamps
-            cursor.execute("""
-                SELECT d.id, d.name, d.created_at, d.updated_at, COUNT(p.id) as product_count
-                FROM departments d
-                LEFT JOIN products p ON d.id = p.department_id
-                GROUP BY d.id, d.name, d.created_at, d.updated_at
-                ORDER BY d.name
-            """)
-            departments = []
-            for row in cursor.fetchall():
-                departments.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'created_at': row[2],
-                    'updated_at': row[3],
-                    'product_count': row[4]
-                })
-        else:
-            # Default format matching Milestone 5 requirements
-            cursor.execute("""
-                SELECT d.id, d.name, COUNT(p.id) as product_count
-                FROM departments d
-                LEFT JOIN products p ON d.id = p.department_id
-                GROUP BY d.id, d.name
-                ORDER BY d.name
-            """)
-            departments = []
-            for row in cursor.fetchall():
-                departments.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'product_count': row[2]
-                })
-        
-        conn.close()
-        return jsonify({'departments': departments}), 200
+            cursor = conn.cursor()
+        
+            if include_details:
+                # Include full details with timestamps
+                departments = []
+                for row in cursor.execute(SQL_DEPARTMENTS_DETAILED):
+                    departments.append({
+                        'id': row[0],
+                        'name': row[1],
+                        'created_at': row[2],
+                        'updated_at': row[3],
+                        'product_count': row[4]
+                    })
+            else:
+                # Default format matching Milestone 5 requirements
+                departments = []
+                for row in cursor.execute(SQL_DEPARTMENTS):
+                    departments.append({
+                        'id': row[0],
+                        'name': row[1],
+                        'product_count': row[2]
+                    })
+        
+        return cache_response(cache_key, {'departments': departments})
         
     except Exception as e:
-        logger.error(f"Error in get_departments: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_departments: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/api/departments/<int:department_id>', methods=['GET'])
 def get_department(department_id):
@@ -253,38 +845,30 @@ def get_department(department_id):
     GET /api/departments/{id} - Get a specific department by ID
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
             
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT d.id, d.name, d.created_at, d.updated_at, COUNT(p.id) as product_count
-            FROM departments d
-            LEFT JOIN products p ON d.id = p.department_id
-            WHERE d.id = ?
-            GROUP BY d.id, d.name, d.created_at, d.updated_at
-        """, (department_id,))
-        row = cursor.fetchone()
-        
-        if row is None:
-            conn.close()
-            return jsonify({'error': 'Department not found'}), 404
-        
-        department = {
-            'id': row[0],
-            'name': row[1],
-            'created_at': row[2],
-            'updated_at': row[3],
-            'product_count': row[4]
-        }
+            cursor = conn.cursor()
+            cursor.execute(SQL_GET_DEPARTMENT, (department_id,))
+            row = cursor.fetchone()
+        
+            if row is None:
+                return jresp({'error': 'Department not found'}, 404)
         
-        conn.close()
-        return jsonify(department), 200
+            department = {
+                'id': row[0],
+                'name': row[1],
+                'created_at': row[2],
+                'updated_at': row[3],
+                'product_count': row[4]
+            }
+        
+            return jresp(department, 200)
         
     except Exception as e:
-        logger.error(f"Error in get_department: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_department: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/api/departments/<int:department_id>/products', methods=['GET'])
 def get_department_products(department_id):
@@ -296,6 +880,7 @@ def get_department_products(department_id):
     - limit: Items per page (default: 10, max: 100)
     - category: Filter by category within department
     - brand: Filter by brand within department
+    - after_id: Return products after this ID (keyset pagination, use next_cursor)
     """
     try:
         # Get query parameters
@@ -303,51 +888,55 @@ def get_department_products(department_id):
         limit = min(request.args.get('limit', 10, type=int), 100)  # Max 100 items per page
         category = request.args.get('category')
         brand = request.args.get('brand')
+        after_id = request.args.get('after_id')
         
         # Calculate offset
         offset = (page - 1) * limit
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
+        # Build the filters once; the count and page queries share them
+        where, params = build_product_filters(category, brand, department_id)
         
-        # First, verify the department exists
-        cursor.execute("SELECT id, name FROM departments WHERE id = ?", (department_id,))
-        dept_row = cursor.fetchone()
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
+            
+            cursor = conn.cursor()
         
-        if dept_row is None:
-            conn.close()
-            return jsonify({'error': 'Department not found'}), 404
+            # Get paginated results
+            query = page_sql(SQL_DEPARTMENT_PRODUCTS, where, after_id is not None)
+            if after_id is not None:
+                # Keyset pagination: seek past the cursor instead of skipping rows
+                params.extend([after_id, limit + 1])
+            else:
+                params.extend([limit, offset])
         
-        department_name = dept_row[1]
+            # Format products straight off the cursor as plain tuples
+            cursor.execute(query, params)
+            products = format_products(cursor, limit)
+            has_more = cursor.fetchone() is not None if after_id is not None else None
         
-        # Build query for products in this department
-        query = """
-            SELECT p.*, d.name as department_name 
-            FROM products p 
-            LEFT JOIN departments d ON p.department_id = d.id 
-            WHERE p.department_id = ?
-        """
-        params = [department_id]
+            # The joined department name comes back with the page; only an
+            # empty page needs a lookup to tell an empty department from a missing one
+            if products and products[0]['department']['name'] is not None:
+                department_name = products[0]['department']['name']
+            else:
+                cursor.execute(SQL_GET_DEPARTMENT_NAME, (department_id,))
+                dept_row = cursor.fetchone()
         
-        if category:
-            query += " AND p.category = ?"
-            params.append(category)
+                if dept_row is None:
+                    return jresp({'error': 'Department not found'}, 404)
         
-        if brand:
-            query += " AND p.brand = ?"
-            params.append(brand)
+                department_name = dept_row[0]
         
-        # Get total count
-        count_query = query.replace("SELECT p.*, d.name as department_name", "SELECT COUNT(*)")
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()[0]
+        # A short first page already holds every match, so skip the count query.
+        # Otherwise count after releasing the connection, as count_products borrows its own
+        if page == 1 and after_id is None and len(products) < limit:
+            total_count = len(products)
+        else:
+            total_count = count_products(category, brand, department_id)
         
         if total_count == 0:
-            conn.close()
-            return jsonify({
+            return jresp({
                 'department': department_name,
                 'products': [],
                 'pagination': {
@@ -356,28 +945,24 @@ def get_department_products(department_id):
                     'total_count': 0,
                     'total_pages': 0,
                     'has_next': False,
-                    'has_prev': False
+                    'has_prev': False,
+                    'next_cursor': None
                 },
                 'filters': {
                     'category': category,
                     'brand': brand
                 }
-            }), 200
-        
-        # Get paginated results
-        query += " ORDER BY p.id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Format products
-        products = [format_product(row) for row in rows]
+            }, 200)
         
         # Calculate pagination info
         total_pages = (total_count + limit - 1) // limit
-        has_next = page < total_pages
-        has_prev = page > 1
+        if after_id is not None:
+            has_next = has_more
+            has_prev = True
+        else:
+            has_next = page < total_pages
+            has_prev = page > 1
+        next_cursor = products[-1]['id'] if has_next and products else None
         
         response = {
             'department': department_name,
@@ -388,7 +973,8 @@ def get_department_products(department_id):
                 'total_count': total_count,
                 'total_pages': total_pages,
                 'has_next': has_next,
-                'has_prev': has_prev
+                'has_prev': has_prev,
+                'next_cursor': next_cursor
             },
             'filters': {
                 'category': category,
@@ -396,12 +982,11 @@ def get_department_products(department_id):
             }
         }
         
-        conn.close()
-        return jsonify(response), 200
+        return jresp(response, 200)
         
     except Exception as e:
-        logger.error(f"Error in get_department_products: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_department_products: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/api/products/stats', methods=['GET'])
 def get_product_stats():
@@ -409,84 +994,18 @@ def get_product_stats():
     GET /api/products/stats - Get product statistics
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        cursor = conn.cursor()
-        
-        # Get basic stats
-        cursor.execute("SELECT COUNT(*) FROM products")
-        total_products = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(DISTINCT category) FROM products")
-        total_categories = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(DISTINCT brand) FROM products")
-        total_brands = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(DISTINCT department_id) FROM products")
-        total_departments = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT AVG(retail_price) FROM products")
-        avg_price = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT MIN(retail_price), MAX(retail_price) FROM products")
-        min_price, max_price = cursor.fetchone()
-        
-        # Get top categories
-        cursor.execute("""
-            SELECT category, COUNT(*) as count 
-            FROM products 
-            GROUP BY category 
-            ORDER BY count DESC 
-            LIMIT 5
-        """)
-        top_categories = [{'category': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        
-        # Get top brands
-        cursor.execute("""
-            SELECT brand, COUNT(*) as count 
-            FROM products 
-            GROUP BY brand 
-            ORDER BY count DESC 
-            LIMIT 5
-        """)
-        top_brands = [{'brand': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        
-        # Get top departments
-        cursor.execute("""
-            SELECT d.name, COUNT(*) as count 
-            FROM products p
-            JOIN departments d ON p.department_id = d.id
-            GROUP BY d.id, d.name 
-            ORDER BY count DESC 
-            LIMIT 5
-        """)
-        top_departments = [{'department': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        stats = {
-            'total_products': total_products,
-            'total_categories': total_categories,
-            'total_brands': total_brands,
-            'total_departments': total_departments,
-            'price_stats': {
-                'average_price': round(float(avg_price), 2),
-                'min_price': round(float(min_price), 2),
-                'max_price': round(float(max_price), 2)
-            },
-            'top_categories': top_categories,
-            'top_brands': top_brands,
-            'top_departments': top_departments
-        }
+        start_stats_refresher()
+        stats = _stats_snapshot
+        if stats is None:
+            stats = refresh_stats_snapshot()
+        if stats is None:
+            return jresp({'error': 'Internal server error'}, 500)
         
-        return jsonify(stats), 200
+        return jresp(stats, 200)
         
     except Exception as e:
-        logger.error(f"Error in get_product_stats: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_product_stats: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
@@ -494,20 +1013,22 @@ def get_categories():
     GET /api/categories - Get all product categories
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+        cached = cached_response('categories')
+        if cached is not None:
+            return cached
+        
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
             
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT category FROM products ORDER BY category")
-        categories = [row[0] for row in cursor.fetchall()]
+            cursor = conn.cursor()
+            categories = [row[0] for row in cursor.execute(SQL_CATEGORIES)]
         
-        conn.close()
-        return jsonify({'categories': categories}), 200
+        return cache_response('categories', {'categories': categories})
         
     except Exception as e:
-        logger.error(f"Error in get_categories: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_categories: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/api/brands', methods=['GET'])
 def get_brands():
@@ -515,35 +1036,69 @@ def get_brands():
     GET /api/brands - Get all product brands
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+        cached = cached_response('brands')
+        if cached is not None:
+            return cached
+        
+        with get_db_connection() as conn:
+            if not conn:
+                return jresp({'error': 'Database connection failed'}, 500)
             
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT brand FROM products ORDER BY brand")
-        brands = [row[0] for row in cursor.fetchall()]
+            cursor = conn.cursor()
+            brands = [row[0] for row in cursor.execute(SQL_BRANDS)]
         
-        conn.close()
-        return jsonify({'brands': brands}), 200
+        return cache_response('brands', {'brands': brands})
         
     except Exception as e:
-        logger.error(f"Error in get_brands: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        logger.error("Error in get_brands: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
+
+@app.route('/api/_cache/flush', methods=['POST'])
+def flush_caches():
+    """
+    POST /api/_cache/flush - Discard cached responses, counts and stats
+    
+    Disabled unless CACHE_FLUSH_TOKEN is set; the X-Admin-Token header must match it.
+    Bumps the shared cache generation, so every worker drops its caches within
+    CACHE_GENERATION_CHECK_INTERVAL seconds.
+    """
+    global _cache_generation, _cache_generation_checked_at
+    token = os.getenv('CACHE_FLUSH_TOKEN')
+    if not token:
+        return jresp({'error': 'Endpoint not found'}, 404)
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jresp({'error': 'Forbidden'}, 403)
+    
+    try:
+        # The pooled connections are read-only, so write through a short-lived one
+        conn = sqlite3.connect(DATABASE_PATH, timeout=5)
+        try:
+            with conn:
+                generation = conn.execute(SQL_BUMP_CACHE_GENERATION).fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error("Failed to bump cache generation: %s", e)
+        return jresp({'error': 'Internal server error'}, 500)
+    
+    invalidate_caches()
+    _cache_generation, _cache_generation_checked_at = generation, time.monotonic()
+    return jresp({'message': 'Caches flushed'}, 200)
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return jresp({'error': 'Endpoint not found'}, 404)
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    return jsonify({'error': 'Internal server error'}), 500
+    return jresp({'error': 'Internal server error'}, 500)
 
 @app.route('/')
 def home():
     """Home endpoint with API documentation"""
-    return jsonify({
+    return jresp({
         'message': 'Products REST API (Refactored with Departments)',
         'version': '2.0.0',
         'endpoints': {
@@ -563,15 +1118,17 @@ def home():
             'brand': 'Filter by brand',
             'department_id': 'Filter by department ID',
             'department_name': 'Filter by department name',
+            'after_id': 'Return products after this ID (keyset pagination via next_cursor)',
             'include_details': 'Include timestamps in departments response (true/false)'
         },
         'database_structure': {
             'products': 'Contains product information with department_id foreign key',
             'departments': 'Contains department information with proper normalization'
         }
-    }), 200
+    }, 200)
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     logger.info("Starting Products REST API (Refactored)...")
     logger.info("Available endpoints:")
     logger.info("  GET /api/products - List all products")
@@ -583,4 +1140,13 @@ if __name__ == '__main__':
     logger.info("  GET /api/categories - Get all categories")
     logger.info("  GET /api/brands - Get all brands")
     
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    ensure_indexes()
+    init_process()
+    
+    # Development server only; production runs under gunicorn:
+    #   gunicorn -c gunicorn.conf.py app:app
+    if '--dev' in sys.argv or os.getenv('FLASK_ENV') == 'dev':
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        logger.info("Using the threaded development server; for production run: gunicorn -c gunicorn.conf.py app:app")
+        app.run(host='0.0.0.0', port=5000, threaded=True) 
\ No newline at end of file
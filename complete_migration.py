@@ -6,22 +6,33 @@ Handles the current state and completes the migration
 
 import sqlite3
 import logging
+import sys
 from datetime import datetime
+from migration_sql import (
+    MIGRATION_PRAGMAS, VERIFY_COUNTS_SQL, POPULATE_DEPARTMENTS_SQL,
+    PRODUCTS_NEW_SCHEMA_SQL, INSERT_REBUILD_SQL, PRODUCTS_INDEX_STATEMENTS,
+    PRODUCTS_VIEW_SQL,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class CompleteMigration:
-    def __init__(self, db_path='products.db'):
+    def __init__(self, db_path='products.db', verbose=False):
         self.db_path = db_path
+        # Full-table COUNT(*) checks only run when verbose
+        self.verbose = verbose
         self.connection = None
         
     def connect(self):
         """Establish database connection"""
         try:
-            self.connection = sqlite3.connect(self.db_path)
+            # Autocommit mode: run_migration issues BEGIN/COMMIT itself
+            self.connection = sqlite3.connect(self.db_path, isolation_level=None)
             self.connection.row_factory = sqlite3.Row
+            for pragma in MIGRATION_PRAGMAS:
+                self.connection.execute(pragma)
             logger.info("Database connection established successfully")
             return True
         except Exception as e:
@@ -68,7 +79,7 @@ class CompleteMigration:
             
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS departments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id INTEGER PRIMARY KEY,
                     name VARCHAR(255) NOT NULL UNIQUE,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -79,7 +90,6 @@ class CompleteMigration:
                 CREATE INDEX IF NOT EXISTS idx_departments_name ON departments(name)
             """)
             
-            self.connection.commit()
             logger.info("Departments table created/verified successfully")
             return True
         except Exception as e:
@@ -91,24 +101,16 @@ class CompleteMigration:
         try:
             cursor = self.connection.cursor()
             
-            # Get unique departments from products table
-            cursor.execute("SELECT DISTINCT department FROM products WHERE department IS NOT NULL AND department != ''")
-            departments = [row[0] for row in cursor.fetchall()]
-            
-            logger.info(f"Found {len(departments)} unique departments: {departments}")
+            # SQLite finds the distinct names and inserts them in one statement
+            cursor.execute(POPULATE_DEPARTMENTS_SQL)
             
-            # Insert departments
-            for dept in departments:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO departments (name) VALUES (?)
-                """, (dept,))
-            
-            self.connection.commit()
+            logger.info(f"Inserted {cursor.rowcount} new departments")
             
             # Verify insertion
-            cursor.execute("SELECT COUNT(*) FROM departments")
-            count = cursor.fetchone()[0]
-            logger.info(f"Successfully populated departments table with {count} departments")
+            if self.verbose:
+                cursor.execute("SELECT COUNT(*) FROM departments")
+                count = cursor.fetchone()[0]
+                logger.info(f"Successfully populated departments table with {count} departments")
             return True
         except Exception as e:
             logger.error(f"Failed to populate departments: {e}")
@@ -127,7 +129,6 @@ class CompleteMigration:
                 cursor.execute("""
                     ALTER TABLE products ADD COLUMN department_id INTEGER
                 """)
-                self.connection.commit()
                 logger.info("Added department_id column to products table")
             else:
                 logger.info("department_id column already exists")
@@ -137,150 +138,82 @@ class CompleteMigration:
             logger.error(f"Failed to add department_id column: {e}")
             return False
     
-    def update_department_ids(self):
-        """Update department_id values based on department names"""
+    def drop_secondary_indexes(self):
+        """Drop the products secondary indexes so bulk writes only touch table pages"""
         try:
             cursor = self.connection.cursor()
             
-            # Get department mappings
-            cursor.execute("SELECT id, name FROM departments")
-            dept_mappings = {row[1]: row[0] for row in cursor.fetchall()}
-            
-            # Update products with department_id
+            # Every explicitly created index on products; the rebuild recreates them
             cursor.execute("""
-                UPDATE products 
-                SET department_id = (
-                    SELECT id FROM departments 
-                    WHERE departments.name = products.department
-                )
+                SELECT name FROM sqlite_master
+                WHERE type = 'index' AND tbl_name = 'products' AND sql IS NOT NULL
             """)
+            indexes = [row[0] for row in cursor.fetchall()]
             
-            self.connection.commit()
-            
-            # Verify update
-            cursor.execute("SELECT COUNT(*) FROM products WHERE department_id IS NOT NULL")
-            updated_count = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM products")
-            total_count = cursor.fetchone()[0]
+            for index in indexes:
+                cursor.execute(f'DROP INDEX IF EXISTS "{index}"')
             
-            logger.info(f"Updated {updated_count} out of {total_count} products with department_id")
+            logger.info(f"Dropped {len(indexes)} secondary indexes before bulk update: {indexes}")
             return True
         except Exception as e:
-            logger.error(f"Failed to update department_ids: {e}")
+            logger.error(f"Failed to drop secondary indexes: {e}")
             return False
     
-    def remove_old_department_column(self):
-        """Remove the old department column"""
+    def update_department_ids(self):
+        """Update department_id values based on department names"""
         try:
             cursor = self.connection.cursor()
             
-            # Get current table structure
-            cursor.execute("PRAGMA table_info(products)")
-            columns = cursor.fetchall()
-            
-            # Create new table without department column
-            column_definitions = []
-            for col in columns:
-                if col[1] != 'department':  # Skip the old department column
-                    col_def = f"{col[1]} {col[2]}"
-                    if col[5] == 1:  # Primary key
-                        col_def += " PRIMARY KEY"
-                    if col[3] == 1:  # NOT NULL
-                        col_def += " NOT NULL"
-                    if col[4] is not None and col[4] != 'CURRENT_TIMESTAMP':
-                        col_def += f" DEFAULT {col[4]}"
-                    elif col[4] == 'CURRENT_TIMESTAMP':
-                        col_def += " DEFAULT CURRENT_TIMESTAMP"
-                    column_definitions.append(col_def)
-            
-            # Create new table
-            new_table_sql = f"""
-                CREATE TABLE products_new (
-                    {', '.join(column_definitions)}
-                )
-            """
-            cursor.execute(new_table_sql)
-            
-            # Copy data to new table (excluding department column)
-            select_columns = [col[1] for col in columns if col[1] != 'department']
-            select_sql = f"SELECT {', '.join(select_columns)} FROM products"
-            
-            cursor.execute(f"INSERT INTO products_new {select_sql}")
-            
-            # Drop old table and rename new table
-            cursor.execute("DROP TABLE products")
-            cursor.execute("ALTER TABLE products_new RENAME TO products")
+            # Update products with department_id in one joined pass, probing
+            # the UNIQUE index on departments.name
+            cursor.execute("""
+                UPDATE products 
+                SET department_id = d.id
+                FROM departments d
+                WHERE d.name = products.department
+            """)
             
-            # Recreate indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_department_id ON products(department_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)")
+            logger.info(f"Updated {cursor.rowcount} products with department_id")
             
-            self.connection.commit()
-            logger.info("Successfully removed old department column")
+            # Verify update (COUNT(column) skips NULLs)
+            if self.verbose:
+                cursor.execute("SELECT COUNT(department_id), COUNT(*) FROM products")
+                updated_count, total_count = cursor.fetchone()
+                logger.info(f"Updated {updated_count} out of {total_count} products with department_id")
             return True
         except Exception as e:
-            logger.error(f"Failed to remove old department column: {e}")
+            logger.error(f"Failed to update department_ids: {e}")
             return False
     
     def add_foreign_key_constraint(self):
-        """Add foreign key constraint"""
+        """
+        Rebuild products once into its final shape: no old department column,
+        department_id NOT NULL with a foreign key, and generated margin columns.
+        Indexes are built after the bulk copy.
+        """
         try:
             cursor = self.connection.cursor()
             
-            # Enable foreign key constraints
-            cursor.execute("PRAGMA foreign_keys = ON")
+            # Create new table with the final schema
+            cursor.execute("DROP TABLE IF EXISTS products_new")
+            cursor.execute(PRODUCTS_NEW_SCHEMA_SQL)
             
-            # Create new table with foreign key constraint
-            cursor.execute("""
-                CREATE TABLE products_with_fk (
-                    id TEXT PRIMARY KEY,
-                    cost REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    name TEXT NOT NULL,
-                    brand TEXT NOT NULL,
-                    retail_price REAL NOT NULL,
-                    sku TEXT NOT NULL,
-                    distribution_center_id INTEGER NOT NULL,
-                    department_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (department_id) REFERENCES departments(id)
-                )
-            """)
-            
-            # Copy data
-            cursor.execute("""
-                INSERT INTO products_with_fk 
-                SELECT * FROM products
-            """)
+            # Copy data once, naming the columns so the old department column is left behind
+            cursor.execute(INSERT_REBUILD_SQL)
             
             # Drop old table and rename
+            cursor.execute("DROP VIEW IF EXISTS products_with_margin")
             cursor.execute("DROP TABLE products")
-            cursor.execute("ALTER TABLE products_with_fk RENAME TO products")
+            cursor.execute("ALTER TABLE products_new RENAME TO products")
             
-            # Recreate indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_department_id ON products(department_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)")
+            # Build indexes after the bulk copy
+            for statement in PRODUCTS_INDEX_STATEMENTS:
+                cursor.execute(statement)
             
             # Recreate view
-            cursor.execute("""
-                CREATE OR REPLACE VIEW products_with_margin AS
-                SELECT 
-                    p.*,
-                    d.name as department_name,
-                    (p.retail_price - p.cost) AS profit_margin,
-                    ROUND(((p.retail_price - p.cost) / p.retail_price * 100), 2) AS profit_margin_percentage
-                FROM products p
-                LEFT JOIN departments d ON p.department_id = d.id
-            """)
+            cursor.execute(PRODUCTS_VIEW_SQL)
             
-            self.connection.commit()
-            logger.info("Successfully added foreign key constraint")
+            logger.info("Successfully rebuilt products with foreign key constraint")
             return True
         except Exception as e:
             logger.error(f"Failed to add foreign key constraint: {e}")
@@ -291,23 +224,13 @@ class CompleteMigration:
         try:
             cursor = self.connection.cursor()
             
-            # Check departments table
-            cursor.execute("SELECT COUNT(*) FROM departments")
-            dept_count = cursor.fetchone()[0]
-            logger.info(f"Departments table has {dept_count} records")
-            
-            # Check products table
-            cursor.execute("SELECT COUNT(*) FROM products")
-            product_count = cursor.fetchone()[0]
-            logger.info(f"Products table has {product_count} records")
-            
-            # Check foreign key relationships
-            cursor.execute("""
-                SELECT COUNT(*) FROM products p
-                JOIN departments d ON p.department_id = d.id
-            """)
-            linked_count = cursor.fetchone()[0]
-            logger.info(f"Products with valid department links: {linked_count}")
+            if self.verbose:
+                # Departments, products and linked products in one round-trip
+                cursor.execute(VERIFY_COUNTS_SQL)
+                dept_count, product_count, linked_count = cursor.fetchone()
+                logger.info(f"Departments table has {dept_count} records")
+                logger.info(f"Products table has {product_count} records")
+                logger.info(f"Products with valid department links: {linked_count}")
             
             # Check that old department column is gone
             cursor.execute("PRAGMA table_info(products)")
@@ -347,6 +270,17 @@ class CompleteMigration:
             if not state:
                 return False
             
+            # Nothing to write when the database is already migrated; just verify it
+            if state['has_departments'] and state['has_department_id'] and not state['has_department']:
+                logger.info("Database is already migrated, skipping to verification")
+                return self.verify_migration()
+            
+            # Steps 3-7 run in one transaction (SQLite DDL is transactional),
+            # so the migration commits once and a failed step changes nothing.
+            # PRAGMA foreign_keys is a no-op inside a transaction, so set it first
+            self.connection.execute("PRAGMA foreign_keys = ON")
+            self.connection.execute("BEGIN")
+            
             # Step 3: Create departments table
             if not self.create_departments_table():
                 return False
@@ -369,21 +303,24 @@ class CompleteMigration:
                 if not self.add_department_id_column():
                     return False
             
-            # Step 6: Update department_ids if needed
+            # Step 6: Update department_ids if needed, with secondary indexes
+            # dropped until the rebuild in step 7 recreates them
             if state['has_department']:
-                if not self.update_department_ids():
+                if not self.drop_secondary_indexes():
                     return False
-            
-            # Step 7: Remove old department column if it exists
-            if state['has_department']:
-                if not self.remove_old_department_column():
+                if not self.update_department_ids():
                     return False
             
-            # Step 8: Add foreign key constraint
+            # Step 7: Rebuild products with the foreign key (drops the old department column)
             if not self.add_foreign_key_constraint():
                 return False
             
-            # Step 9: Verify migration
+            # Refresh planner statistics for the rebuilt table and indexes
+            self.connection.execute("ANALYZE")
+            
+            self.connection.commit()
+            
+            # Step 8: Verify migration
             if not self.verify_migration():
                 return False
             
@@ -394,11 +331,14 @@ class CompleteMigration:
             logger.error(f"Migration failed: {e}")
             return False
         finally:
+            if self.connection and self.connection.in_transaction:
+                self.connection.rollback()
+                logger.info("Migration rolled back")
             self.disconnect()
 
 def main():
     """Main function to run the migration"""
-    migration = CompleteMigration()
+    migration = CompleteMigration(verbose='--verbose' in sys.argv)
     success = migration.run_migration()
     
     if success:
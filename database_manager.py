@@ -1,14 +1,118 @@
+import csv
+import io
+import math
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import numpy as np
 import psycopg2
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 from config import get_database_url, CSV_FILE_PATH
 
+# Columns every CSV chunk must have, and how _prepare_data coerces them
+REQUIRED_COLUMNS = ['id', 'cost', 'category', 'name', 'brand', 'retail_price', 'department', 'sku', 'distribution_center_id']
+STR_COLUMNS = {'id': 'string', 'category': 'string', 'name': 'string', 'brand': 'string', 'department': 'string', 'sku': 'string'}
+NUM_COLUMNS = ['cost', 'retail_price', 'distribution_center_id']
+
+# Product columns loaded with COPY; integer columns are written as Int64 so
+# pandas does not render them as floats like "1.0"
+COPY_COLUMNS = ['id', 'cost', 'category', 'name', 'brand', 'retail_price', 'sku', 'distribution_center_id', 'department_id']
+# FORCE_NOT_NULL loads blank text fields as empty strings instead of NULLs
+# that the NOT NULL columns would reject
+COPY_PRODUCTS_SQL = f"COPY products ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (id, category, name, brand, sku))"
+
+# Chunks COPY'd concurrently while the next ones are parsed, each on its own
+# pooled connection; the pool also covers self.connection
+COPY_WORKERS = 4
+
+# The concurrent COPYs land in an unlogged staging table with no primary key
+# or constraints, so workers never wait on each other's uncommitted rows; one
+# INSERT ... SELECT then moves everything into products in a single transaction
+STAGING_TABLE = 'products_staging'
+CREATE_STAGING_SQL = f"""
+    CREATE UNLOGGED TABLE {STAGING_TABLE} AS
+    SELECT {', '.join(COPY_COLUMNS)} FROM products WITH NO DATA
+"""
+COPY_STAGING_SQL = f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (id, category, name, brand, sku))"
+INSERT_FROM_STAGING_SQL = f"""
+    INSERT INTO products ({', '.join(COPY_COLUMNS)})
+    SELECT {', '.join(COPY_COLUMNS)} FROM {STAGING_TABLE}
+"""
+DB_POOL_SIZE = 8
+
+# Secondary indexes on products, dropped for a bulk load and rebuilt after it
+# (kept in step with database_schema.sql)
+PRODUCT_INDEXES = {
+    'idx_products_category_id': "CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category, id)",
+    'idx_products_brand_id': "CREATE INDEX IF NOT EXISTS idx_products_brand_id ON products(brand, id)",
+    'idx_products_dept_id': "CREATE INDEX IF NOT EXISTS idx_products_dept_id ON products(department_id, id)",
+    'idx_products_distribution_center': "CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)",
+    'idx_products_sku': "CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)",
+    'idx_products_cat_brand_dept_id': "CREATE INDEX IF NOT EXISTS idx_products_cat_brand_dept_id ON products(category, brand, department_id, id)",
+}
+
+# verify_data_loading's queries, built once so SQLAlchemy's compiled cache
+# and psycopg2 see the same statement objects on every run
+VERIFY_STATEMENTS = {
+    'total': text("SELECT COUNT(*) FROM products"),
+    'departments': text("SELECT COUNT(*) FROM departments"),
+    'invalid_prices': text("SELECT COUNT(*) FROM products WHERE cost <= 0 OR retail_price <= 0"),
+    'linked': text("""
+        SELECT COUNT(*) FROM products p
+        JOIN departments d ON p.department_id = d.id
+    """),
+    'sample': text("""
+        SELECT p.name, p.brand, d.name as department_name
+        FROM products p
+        JOIN departments d ON p.department_id = d.id
+        LIMIT 5
+    """),
+}
+
+# Rows per CSV block handed to COPY by load_csv_fast
+STREAM_BATCH_ROWS = 10000
+
+# Chunk progress is logged once every this many chunks
+PROGRESS_LOG_CHUNKS = 32
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class IteratorReader(io.TextIOBase):
+    """Read-only text file over an iterator of strings, for cursor.copy_expert"""
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ''
+        self._offset = 0
+    
+    def readable(self):
+        return True
+    
+    def read(self, size=-1):
+        # Hand out slices of the current chunk by offset, so each call copies
+        # only the characters it returns
+        if size is None or size < 0:
+            data = self._buffer[self._offset:] + ''.join(self._chunks)
+            self._buffer, self._offset = '', 0
+            return data
+        parts = []
+        while size > 0:
+            if self._offset >= len(self._buffer):
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer, self._offset = chunk, 0
+                continue
+            part = self._buffer[self._offset:self._offset + size]
+            self._offset += len(part)
+            size -= len(part)
+            parts.append(part)
+        return ''.join(parts)
+
 class DatabaseManager:
     def __init__(self):
         self.engine = None
@@ -18,7 +122,17 @@ class DatabaseManager:
         """Establish database connection"""
         try:
             database_url = get_database_url()
-            self.engine = create_engine(database_url)
+            # Batch executemany() through psycopg2's fast execution helpers
+            # (insertmanyvalues_page_size is SQLAlchemy 2.0's name for the
+            # old executemany_values_page_size)
+            self.engine = create_engine(
+                database_url,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=0,
+                executemany_mode='values_plus_batch',
+                insertmanyvalues_page_size=10000,
+                executemany_batch_page_size=500,
+            )
             self.connection = self.engine.connect()
             logger.info("Database connection established successfully")
             return True
@@ -40,14 +154,18 @@ class DatabaseManager:
             with open('database_schema.sql', 'r') as file:
                 schema_sql = file.read()
             
-            # Split by semicolon and execute each statement
-            statements = schema_sql.split(';')
-            for statement in statements:
-                statement = statement.strip()
-                if statement and not statement.startswith('--'):
-                    self.connection.execute(text(statement))
+            # Send the whole script in one call; psycopg2 accepts multiple
+            # statements and the server parses them, comments and all
+            raw_connection = self.engine.raw_connection()
+            try:
+                raw_connection.cursor().execute(schema_sql)
+                raw_connection.commit()
+            except Exception:
+                raw_connection.rollback()
+                raise
+            finally:
+                raw_connection.close()
             
-            self.connection.commit()
             logger.info("Database schema created successfully")
             return True
         except Exception as e:
@@ -62,24 +180,76 @@ class DatabaseManager:
             # First, extract unique departments and populate departments table
             self._populate_departments_table()
             
+            # Look up the department ids once for all chunks
+            result = self.connection.execute(text("SELECT name, id FROM departments"))
+            dept_mappings = dict(result.fetchall())
+            
             # Read CSV in chunks to handle large files
             chunk_count = 0
             total_rows = 0
             
-            for chunk in pd.read_csv(CSV_FILE_PATH, chunksize=batch_size):
-                # Clean and prepare data
-                chunk = self._prepare_data(chunk)
-                
-                # Get department IDs for the chunk
-                chunk = self._add_department_ids(chunk)
-                
-                # Insert chunk into database
-                chunk.to_sql('products', self.engine, if_exists='append', index=False, method='multi')
+            # Stream chunks through COPY on raw psycopg2 connections, bypassing
+            # per-row INSERT parsing. Up to COPY_WORKERS chunks are in flight
+            # while the main thread parses and prepares the next one
+            self._drop_product_indexes()
+            self._create_staging_table()
+            raw_connections = [self.engine.raw_connection() for _ in range(COPY_WORKERS)]
+            idle_connections = queue.Queue()
+            for raw_connection in raw_connections:
+                idle_connections.put(raw_connection)
+            
+            def copy_chunk(chunk):
+                """COPY one prepared chunk into the staging table on an idle raw connection"""
+                raw_connection = idle_connections.get()
+                try:
+                    raw_connection.cursor().copy_expert(COPY_STAGING_SQL, self._to_csv_buffer(chunk))
+                    raw_connection.commit()
+                except Exception:
+                    raw_connection.rollback()
+                    raise
+                finally:
+                    idle_connections.put(raw_connection)
+                return len(chunk)
+            
+            try:
+                pending = deque()
+                with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+                    # The C parser reads only the required columns and types the
+                    # text ones itself; _prepare_data is left to coerce the numbers
+                    for chunk in pd.read_csv(CSV_FILE_PATH, chunksize=batch_size, engine='c',
+                                             usecols=lambda column: column in REQUIRED_COLUMNS, dtype=STR_COLUMNS):
+                        # Clean and prepare data
+                        chunk = self._prepare_data(chunk)
+                        
+                        # Get department IDs for the chunk
+                        chunk = self._add_department_ids(chunk, dept_mappings)
+                        
+                        # Wait for the oldest chunk once COPY_WORKERS are in flight
+                        if len(pending) >= COPY_WORKERS:
+                            total_rows += pending.popleft().result()
+                        
+                        pending.append(executor.submit(copy_chunk, chunk))
+                        chunk_count += 1
+                        if chunk_count % PROGRESS_LOG_CHUNKS == 0:
+                            logger.info(f"Queued chunk {chunk_count}: {len(chunk)} rows (Loaded: {total_rows})")
+                    
+                    while pending:
+                        total_rows += pending.popleft().result()
                 
-                chunk_count += 1
-                total_rows += len(chunk)
-                logger.info(f"Loaded chunk {chunk_count}: {len(chunk)} rows (Total: {total_rows})")
+                # Publish every staged row at once; a failure here (e.g. a
+                # duplicate id) rolls back and leaves products untouched
+                self.connection.execute(text(INSERT_FROM_STAGING_SQL))
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+            finally:
+                for raw_connection in raw_connections:
+                    raw_connection.close()
+                self._drop_staging_table()
+                self._create_product_indexes()
             
+            self._refresh_department_counts()
             logger.info(f"Data loading completed. Total rows loaded: {total_rows}")
             return True
             
@@ -87,32 +257,143 @@ class DatabaseManager:
             logger.error(f"Failed to load CSV data: {e}")
             return False
     
+    def load_csv_fast(self, batch_size=1000):
+        """Stream the CSV straight into COPY without building DataFrames"""
+        try:
+            logger.info(f"Streaming data from {CSV_FILE_PATH}")
+            
+            with open(CSV_FILE_PATH, newline='') as file:
+                reader = csv.reader(file)
+                
+                # Anything but the expected columns in the expected order goes
+                # through the pandas loader, which reorders and coerces them
+                header = next(reader, [])
+                if header != REQUIRED_COLUMNS:
+                    logger.info(f"CSV columns {header} differ from {REQUIRED_COLUMNS}, using the pandas loader")
+                    return self.load_csv_data(batch_size=batch_size)
+                
+                self._populate_departments_table()
+                result = self.connection.execute(text("SELECT name, id FROM departments"))
+                dept_mappings = dict(result.fetchall())
+                
+                self._drop_product_indexes()
+                raw_connection = self.engine.raw_connection()
+                try:
+                    cursor = raw_connection.cursor()
+                    cursor.copy_expert(COPY_PRODUCTS_SQL, IteratorReader(self._clean_csv_rows(reader, dept_mappings)))
+                    raw_connection.commit()
+                    total_rows = cursor.rowcount
+                except Exception:
+                    raw_connection.rollback()
+                    raise
+                finally:
+                    raw_connection.close()
+                    self._create_product_indexes()
+            
+            self._refresh_department_counts()
+            logger.info(f"Data streaming completed. Total rows loaded: {total_rows}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to stream CSV data: {e}")
+            return False
+    
+    def _drop_product_indexes(self):
+        """Drop the products secondary indexes so COPY only appends table rows"""
+        for index in PRODUCT_INDEXES:
+            self.connection.execute(text(f"DROP INDEX IF EXISTS {index}"))
+        self.connection.commit()
+    
+    def _create_product_indexes(self):
+        """Rebuild the products secondary indexes, one sorted build each"""
+        for statement in PRODUCT_INDEXES.values():
+            self.connection.execute(text(statement))
+        self.connection.commit()
+        logger.info(f"Rebuilt {len(PRODUCT_INDEXES)} product indexes")
+    
+    def _create_staging_table(self):
+        """Create an empty staging table for the concurrent COPYs, replacing any leftover one"""
+        self._drop_staging_table()
+        self.connection.execute(text(CREATE_STAGING_SQL))
+        self.connection.commit()
+    
+    def _drop_staging_table(self):
+        """Drop the COPY staging table"""
+        self.connection.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+        self.connection.commit()
+    
+    def _refresh_department_counts(self):
+        """Recompute the department_counts materialized view after a load"""
+        # CONCURRENTLY (backed by its unique index) keeps the view readable meanwhile
+        self.connection.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY department_counts"))
+        self.connection.commit()
+    
+    def _clean_csv_rows(self, reader, dept_mappings):
+        """Yield blocks of COPY-ready CSV lines, dropping rows _prepare_data would drop"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        rows = 0
+        skipped = 0
+        for row in reader:
+            # Skip ragged rows, then rows without an id or with non-numeric or
+            # non-finite (nan, inf, 1e400) prices, as np.isfinite does in _prepare_data
+            if len(row) != len(REQUIRED_COLUMNS):
+                skipped += 1
+                continue
+            id_, cost, category, name, brand, retail_price, department, sku, distribution_center_id = row
+            try:
+                prices_ok = math.isfinite(float(cost)) and math.isfinite(float(retail_price))
+            except ValueError:
+                prices_ok = False
+            if not prices_ok or not id_:
+                skipped += 1
+                continue
+            
+            writer.writerow((
+                id_, cost, category, name, brand, retail_price, sku,
+                distribution_center_id if distribution_center_id.isdigit() else '',
+                dept_mappings.get(department, ''),
+            ))
+            rows += 1
+            if rows == STREAM_BATCH_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                rows = 0
+        if skipped:
+            logger.info(f"Skipped {skipped} malformed CSV rows")
+        yield buffer.getvalue()
+    
     def _populate_departments_table(self):
         """Extract unique departments from CSV and populate departments table"""
         try:
             logger.info("Extracting unique departments from CSV...")
             
-            # Read all unique departments from CSV
-            df = pd.read_csv(CSV_FILE_PATH)
-            unique_departments = df['department'].dropna().unique()
+            # Collect unique departments reading only that column, in chunks,
+            # so the full CSV is never held in memory. A dict keeps first-seen
+            # order, which decides the department ids.
+            unique_departments = {}
+            for chunk in pd.read_csv(CSV_FILE_PATH, usecols=['department'], dtype=str, chunksize=100_000):
+                unique_departments.update(dict.fromkeys(chunk['department'].dropna().unique()))
+            unique_departments = list(unique_departments)
             
             logger.info(f"Found {len(unique_departments)} unique departments: {list(unique_departments)}")
             
             # Create departments table if it doesn't exist
             self.connection.execute(text("""
                 CREATE TABLE IF NOT EXISTS departments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id SERIAL PRIMARY KEY,
                     name VARCHAR(255) NOT NULL UNIQUE,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """))
             
-            # Insert departments
-            for dept in unique_departments:
-                self.connection.execute(text("""
-                    INSERT OR IGNORE INTO departments (name) VALUES (:name)
-                """), {'name': dept})
+            # Insert all departments with one executemany call
+            self.connection.execute(
+                text("INSERT INTO departments (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+                [{'name': dept} for dept in unique_departments]
+            )
             
             self.connection.commit()
             logger.info("Departments table populated successfully")
@@ -122,47 +403,51 @@ class DatabaseManager:
             logger.error(f"Failed to populate departments table: {e}")
             return False
     
-    def _add_department_ids(self, df):
+    def _add_department_ids(self, df, dept_mappings):
         """Add department_id column to dataframe based on department names"""
         try:
-            # Get department mappings
-            result = self.connection.execute(text("SELECT id, name FROM departments"))
-            dept_mappings = {row[1]: row[0] for row in result.fetchall()}
-            
-            # Add department_id column
-            df['department_id'] = df['department'].map(dept_mappings)
-            
-            # Remove the old department column
-            df = df.drop(columns=['department'])
+            # Add department_id column: encode names as categorical codes
+            # against the known departments, then index an array of their ids
+            # (code -1 marks names with no department and becomes NA)
+            codes = pd.Categorical(df['department'], categories=list(dept_mappings)).codes
+            ids = np.fromiter(dept_mappings.values(), dtype=np.int64, count=len(dept_mappings))
+            df['department_id'] = pd.array(ids[codes], dtype='Int64')
+            df.loc[codes == -1, 'department_id'] = pd.NA
             
+            # The old department column is left in place: _to_csv_buffer only
+            # writes COPY_COLUMNS, so dropping it would just copy the frame
             return df
             
         except Exception as e:
             logger.error(f"Failed to add department IDs: {e}")
             return df
     
+    def _to_csv_buffer(self, df):
+        """Serialize a prepared chunk as headerless CSV in COPY_COLUMNS order"""
+        # Selecting the columns is the only copy; astype(copy=False) reuses
+        # every column it does not convert
+        df = df[COPY_COLUMNS].astype({'distribution_center_id': 'Int64'}, copy=False)
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        return buffer
+    
     def _prepare_data(self, df):
         """Prepare and clean the dataframe before insertion"""
         # Ensure all required columns exist
-        required_columns = ['id', 'cost', 'category', 'name', 'brand', 'retail_price', 'department', 'sku', 'distribution_center_id']
-        
-        for col in required_columns:
-            if col not in df.columns:
-                raise ValueError(f"Missing required column: {col}")
+        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required column: {missing[0]}")
         
-        # Clean data types
-        df['id'] = df['id'].astype(str)
-        df['cost'] = pd.to_numeric(df['cost'], errors='coerce')
-        df['category'] = df['category'].astype(str)
-        df['name'] = df['name'].astype(str)
-        df['brand'] = df['brand'].astype(str)
-        df['retail_price'] = pd.to_numeric(df['retail_price'], errors='coerce')
-        df['department'] = df['department'].astype(str)
-        df['sku'] = df['sku'].astype(str)
-        df['distribution_center_id'] = pd.to_numeric(df['distribution_center_id'], errors='coerce')
+        # Text columns arrive as string dtype from read_csv (missing values
+        # stay NA instead of becoming "nan"); coerce the numeric ones in one pass
+        df[NUM_COLUMNS] = df[NUM_COLUMNS].apply(pd.to_numeric, errors='coerce')
         
-        # Remove rows with null values in critical fields
-        df = df.dropna(subset=['id', 'cost', 'retail_price'])
+        # Remove rows with null values in critical fields, combining the
+        # checks as one NumPy mask instead of a dropna pass
+        mask = df['id'].notna().to_numpy() & np.isfinite(df['cost'].to_numpy()) & np.isfinite(df['retail_price'].to_numpy())
+        if not mask.all():
+            df = df.iloc[mask]
         
         return df
     
@@ -170,36 +455,23 @@ class DatabaseManager:
         """Verify that data was loaded correctly"""
         try:
             # Count total rows
-            result = self.connection.execute(text("SELECT COUNT(*) FROM products"))
-            total_count = result.fetchone()[0]
+            total_count = self.connection.execute(VERIFY_STATEMENTS['total']).scalar()
             logger.info(f"Total products in database: {total_count}")
             
             # Count departments
-            result = self.connection.execute(text("SELECT COUNT(*) FROM departments"))
-            dept_count = result.fetchone()[0]
+            dept_count = self.connection.execute(VERIFY_STATEMENTS['departments']).scalar()
             logger.info(f"Total departments in database: {dept_count}")
             
             # Check for data quality
-            result = self.connection.execute(text("SELECT COUNT(*) FROM products WHERE cost <= 0 OR retail_price <= 0"))
-            invalid_prices = result.fetchone()[0]
+            invalid_prices = self.connection.execute(VERIFY_STATEMENTS['invalid_prices']).scalar()
             logger.info(f"Products with invalid prices: {invalid_prices}")
             
             # Check foreign key relationships
-            result = self.connection.execute(text("""
-                SELECT COUNT(*) FROM products p
-                JOIN departments d ON p.department_id = d.id
-            """))
-            linked_count = result.fetchone()[0]
+            linked_count = self.connection.execute(VERIFY_STATEMENTS['linked']).scalar()
             logger.info(f"Products with valid department links: {linked_count}")
             
             # Sample data verification
-            result = self.connection.execute(text("""
-                SELECT p.name, p.brand, d.name as department_name
-                FROM products p
-                JOIN departments d ON p.department_id = d.id
-                LIMIT 5
-            """))
-            sample_data = result.fetchall()
+            sample_data = self.connection.execute(VERIFY_STATEMENTS['sample']).fetchall()
             logger.info("Sample data from database:")
             for row in sample_data:
                 logger.info(f"  Product: {row[0]}, Brand: {row[1]}, Department: {row[2]}")
@@ -210,6 +482,23 @@ class DatabaseManager:
             logger.error(f"Failed to verify data: {e}")
             return False
     
+    def export_query(self, sql, path):
+        """Dump a query's result to a CSV file with COPY TO STDOUT"""
+        try:
+            # COPY streams the rows as CSV bytes, so no per-row tuples are built
+            raw_connection = self.engine.raw_connection()
+            try:
+                with open(path, 'wb') as file:
+                    raw_connection.cursor().copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", file)
+            finally:
+                raw_connection.close()
+            
+            logger.info(f"Exported query results to {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to export query to {path}: {e}")
+            return False
+    
     def run_verification_queries(self):
         """Run various verification queries to analyze the data"""
         queries = {
@@ -217,11 +506,13 @@ class DatabaseManager:
             "Total Departments": "SELECT COUNT(*) FROM departments",
             "Products by Category": "SELECT category, COUNT(*) as count FROM products GROUP BY category ORDER BY count DESC LIMIT 10",
             "Products by Brand": "SELECT brand, COUNT(*) as count FROM products GROUP BY brand ORDER BY count DESC LIMIT 10",
+            # Read from the department_counts view each load refreshes
             "Products by Department": """
-                SELECT d.name as department, COUNT(*) as count 
-                FROM products p 
-                JOIN departments d ON p.department_id = d.id 
-                GROUP BY d.name ORDER BY count DESC LIMIT 10
+                SELECT d.name as department, dc.product_count as count
+                FROM department_counts dc
+                JOIN departments d ON dc.department_id = d.id
+                WHERE dc.product_count > 0
+                ORDER BY count DESC LIMIT 10
             """,
             "Average Price by Category": "SELECT category, AVG(retail_price) as avg_price FROM products GROUP BY category ORDER BY avg_price DESC LIMIT 10",
             "Average Price by Department": """
@@ -239,17 +530,24 @@ class DatabaseManager:
             """
         }
         
-        results = {}
-        for query_name, query in queries.items():
+        def run_query(query_name, query):
+            """Run one verification query on its own pooled connection"""
             try:
-                result = self.connection.execute(text(query))
-                if query_name in ["Total Products", "Total Departments"]:
-                    results[query_name] = result.fetchone()[0]
-                else:
-                    results[query_name] = result.fetchall()
+                with self.engine.connect() as connection:
+                    result = connection.execute(text(query))
+                    if query_name in ["Total Products", "Total Departments"]:
+                        value = result.fetchone()[0]
+                    else:
+                        value = result.fetchall()
                 logger.info(f"Query '{query_name}' executed successfully")
+                return value
             except Exception as e:
                 logger.error(f"Failed to execute query '{query_name}': {e}")
-                results[query_name] = None
+                return None
+        
+        # The queries are independent and read-only, so run them concurrently;
+        # self.connection already holds one slot of the pool
+        with ThreadPoolExecutor(max_workers=min(len(queries), DB_POOL_SIZE - 1)) as executor:
+            futures = {query_name: executor.submit(run_query, query_name, query) for query_name, query in queries.items()}
         
-        return results 
\ No newline at end of file
+        return {query_name: future.result() for query_name, future in futures.items()} 
\ No newline at end of file
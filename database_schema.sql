@@ -3,7 +3,7 @@
 
 -- Create departments table
 CREATE TABLE IF NOT EXISTS departments (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id SERIAL PRIMARY KEY,
     name VARCHAR(255) NOT NULL UNIQUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -20,26 +20,44 @@ CREATE TABLE IF NOT EXISTS products (
     sku VARCHAR(255) NOT NULL,
     distribution_center_id INTEGER NOT NULL,
     department_id INTEGER NOT NULL,
+    profit_margin DECIMAL(10, 4) GENERATED ALWAYS AS (retail_price - cost) STORED,
+    profit_margin_percentage DECIMAL(10, 2) GENERATED ALWAYS AS (ROUND(((retail_price - cost) / retail_price * 100), 2)) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (department_id) REFERENCES departments(id)
 );
 
+-- Add the generated margin columns to a products table created before they existed
+ALTER TABLE products ADD COLUMN IF NOT EXISTS profit_margin DECIMAL(10, 4) GENERATED ALWAYS AS (retail_price - cost) STORED;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS profit_margin_percentage DECIMAL(10, 2) GENERATED ALWAYS AS (ROUND(((retail_price - cost) / retail_price * 100), 2)) STORED;
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_departments_name ON departments(name);
-CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
-CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand);
-CREATE INDEX IF NOT EXISTS idx_products_department_id ON products(department_id);
+CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category, id);
+CREATE INDEX IF NOT EXISTS idx_products_brand_id ON products(brand, id);
+CREATE INDEX IF NOT EXISTS idx_products_dept_id ON products(department_id, id);
 CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id);
 CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+CREATE INDEX IF NOT EXISTS idx_products_cat_brand_dept_id ON products(category, brand, department_id, id);
+
+-- Per-department product counts for the verification report, refreshed after
+-- each CSV load (app.py keeps a trigger-maintained table of the same name)
+CREATE MATERIALIZED VIEW IF NOT EXISTS department_counts AS
+SELECT d.id AS department_id, COUNT(p.id) AS product_count
+FROM departments d
+LEFT JOIN products p ON d.id = p.department_id
+GROUP BY d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_department_counts_id ON department_counts(department_id);
 
--- Create a view for products with calculated profit margin and department name
-CREATE OR REPLACE VIEW products_with_margin AS
+-- Create a view for products with department name (profit margins are generated columns).
+-- Dropped first: CREATE OR REPLACE VIEW cannot drop the computed margin
+-- columns an older version of this view had
+DROP VIEW IF EXISTS products_with_margin;
+CREATE VIEW products_with_margin AS
 SELECT 
     p.*,
-    d.name as department_name,
-    (p.retail_price - p.cost) AS profit_margin,
-    ROUND(((p.retail_price - p.cost) / p.retail_price * 100), 2) AS profit_margin_percentage
+    d.name as department_name
 FROM products p
 LEFT JOIN departments d ON p.department_id = d.id;
 
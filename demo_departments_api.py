@@ -14,28 +14,21 @@ def demo_departments_api():
     
     # Connect to database
     conn = sqlite3.connect('products.db')
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     # 1. Demo GET /api/departments response format
     print("\n1. 📋 GET /api/departments - List all departments")
     print("-" * 50)
     
-    cursor.execute("""
+    # Rows become dicts keyed by the selected column names
+    departments = [dict(row) for row in cursor.execute("""
         SELECT d.id, d.name, COUNT(p.id) as product_count
         FROM departments d
         LEFT JOIN products p ON d.id = p.department_id
         GROUP BY d.id, d.name
         ORDER BY d.name
-    """)
-    
-    departments = []
-    for row in cursor.fetchall():
-        dept = {
-            'id': row[0],
-            'name': row[1],
-            'product_count': row[2]
-        }
-        departments.append(dept)
+    """)]
     
     response = {'departments': departments}
     print("Expected API Response:")
@@ -55,13 +48,7 @@ def demo_departments_api():
     
     row = cursor.fetchone()
     if row:
-        department = {
-            'id': row[0],
-            'name': row[1],
-            'created_at': row[2],
-            'updated_at': row[3],
-            'product_count': row[4]
-        }
+        department = dict(row)
         print("Expected API Response (Department ID 1):")
         print(json.dumps(department, indent=2))
     
@@ -69,26 +56,17 @@ def demo_departments_api():
     print("\n3. 📦 GET /api/departments/{id}/products - Get products in department")
     print("-" * 50)
     
-    cursor.execute("""
+    products = []
+    for row in cursor.execute("""
         SELECT p.id, p.name, p.brand, p.retail_price, d.name as department_name
         FROM products p
         JOIN departments d ON p.department_id = d.id
         WHERE p.department_id = 1
         LIMIT 3
-    """)
-    
-    products = []
-    for row in cursor.fetchall():
-        product = {
-            'id': row[0],
-            'name': row[1],
-            'brand': row[2],
-            'retail_price': float(row[3]),
-            'department': {
-                'id': 1,
-                'name': row[4]
-            }
-        }
+    """):
+        product = dict(row)
+        product['retail_price'] = float(product['retail_price'])
+        product['department'] = {'id': 1, 'name': product.pop('department_name')}
         products.append(product)
     
     # Get total count for pagination
@@ -3,6 +3,8 @@
 Examine the CSV file to understand what departments should be
 """
 
+import pandas as pd
+
 def examine_csv():
     """Examine the CSV file structure and department values"""
     try:
@@ -21,31 +23,21 @@ def examine_csv():
                 if line:
                     print(f"Row {i+1}: {line[:200]}...")
                     print()
-            
-            # Now let's count unique department values
-            f.seek(0)  # Go back to start
-            f.readline()  # Skip header
-            
-            departments = set()
-            for i, line in enumerate(f):
-                if i >= 1000:  # Only check first 1000 rows for speed
-                    break
-                parts = line.split(',')
-                if len(parts) >= 8:  # Assuming department is in a specific column
-                    # Try different positions for department
-                    for pos in [7, 8, 9]:  # Common positions for department
-                        if pos < len(parts):
-                            dept = parts[pos].strip().strip('"')
-                            if dept and dept != 'department':  # Skip header if present
-                                departments.add(dept)
-            
-            print("🏪 UNIQUE DEPARTMENT VALUES (from first 1000 rows):")
-            print("=" * 50)
-            for dept in sorted(departments):
-                print(f"📦 {dept}")
-            
-            print(f"\n📊 Total unique departments found: {len(departments)}")
-            
+        
+        # Now let's count unique department values: the C parser reads just
+        # the department column of the first 1000 rows, and its categories are
+        # the sorted unique values without NaN
+        columns = pd.read_csv('products.csv', nrows=0).columns.tolist()
+        dept_col = next(col for col in columns if 'depart' in col.lower())
+        departments = pd.read_csv('products.csv', usecols=[dept_col], nrows=1000, dtype={dept_col: 'category'})[dept_col].cat.categories
+        
+        print("🏪 UNIQUE DEPARTMENT VALUES (from first 1000 rows):")
+        print("=" * 50)
+        for dept in departments:
+            print(f"📦 {dept}")
+        
+        print(f"\n📊 Total unique departments found: {len(departments)}")
+        
     except Exception as e:
         print(f"❌ Error examining CSV: {e}")
 
@@ -4,8 +4,13 @@ Finalize Migration: Add Foreign Key Constraint
 Simple script to complete the migration
 """
 
+import sys
 import sqlite3
 import logging
+from migration_sql import (
+    MIGRATION_PRAGMAS, VERIFY_COUNTS_SQL, PRODUCTS_NEW_SCHEMA_SQL,
+    INSERT_REBUILD_SQL, PRODUCTS_INDEX_STATEMENTS, PRODUCTS_VIEW_SQL,
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -14,56 +19,57 @@ def finalize_migration():
     """Finalize the migration by adding foreign key constraint"""
     try:
         conn = sqlite3.connect('products.db')
+        for pragma in MIGRATION_PRAGMAS:
+            conn.execute(pragma)
         cursor = conn.cursor()
         
-        # Enable foreign key constraints
-        cursor.execute("PRAGMA foreign_keys = ON")
+        # Skip per-row foreign key lookups during the bulk copy; the whole
+        # table is checked once with foreign_key_check before committing
+        cursor.execute("PRAGMA foreign_keys = OFF")
         
-        # Create new table with foreign key constraint
-        cursor.execute("""
-            CREATE TABLE products_final (
-                id TEXT PRIMARY KEY,
-                cost REAL NOT NULL,
-                category TEXT NOT NULL,
-                name TEXT NOT NULL,
-                brand TEXT NOT NULL,
-                retail_price REAL NOT NULL,
-                sku TEXT NOT NULL,
-                distribution_center_id INTEGER NOT NULL,
-                department_id INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (department_id) REFERENCES departments(id)
-            )
-        """)
-        
-        # Copy data
-        cursor.execute("""
-            INSERT INTO products_final 
-            SELECT * FROM products
-        """)
-        
-        # Drop old table and rename
-        cursor.execute("DROP TABLE products")
-        cursor.execute("ALTER TABLE products_final RENAME TO products")
+        # Copy, index and view rebuild run as one write transaction
+        cursor.execute("BEGIN IMMEDIATE")
         
-        # Recreate indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_department_id ON products(department_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)")
+        # A database already rebuilt by migration_departments.py or
+        # complete_migration.py has no department column and generated
+        # margin columns; only its view may need replacing
+        columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(products)")}
+        if 'department' not in columns and 'profit_margin' in columns:
+            logger.info("Products table already has the final schema, skipping the rebuild")
+        else:
+            # Create new table with the final schema
+            cursor.execute("DROP TABLE IF EXISTS products_new")
+            cursor.execute(PRODUCTS_NEW_SCHEMA_SQL)
+            
+            # Copy data into the index-less table, naming the columns so their
+            # order in the old table (department_id was appended last) doesn't matter
+            cursor.execute(INSERT_REBUILD_SQL)
+            
+            # Drop old table and rename (the view goes first so the rename
+            # doesn't trip over it referencing a missing products table)
+            cursor.execute("DROP VIEW IF EXISTS products_with_margin")
+            cursor.execute("DROP TABLE products")
+            cursor.execute("ALTER TABLE products_new RENAME TO products")
+            
+            # Build indexes after the bulk copy
+            for statement in PRODUCTS_INDEX_STATEMENTS:
+                cursor.execute(statement)
+        
+        # Recreate view, replacing any older one that computed the margins itself
+        cursor.execute("DROP VIEW IF EXISTS products_with_margin")
+        cursor.execute(PRODUCTS_VIEW_SQL)
+        
+        # Verify every department_id in one scan
+        cursor.execute("PRAGMA foreign_key_check(products)")
+        violations = cursor.fetchall()
+        if violations:
+            conn.rollback()
+            conn.close()
+            logger.error(f"Foreign key check failed for {len(violations)} products")
+            return False
         
-        # Recreate view
-        cursor.execute("""
-            CREATE OR REPLACE VIEW products_with_margin AS
-            SELECT 
-                p.*,
-                d.name as department_name,
-                (p.retail_price - p.cost) AS profit_margin,
-                ROUND(((p.retail_price - p.cost) / p.retail_price * 100), 2) AS profit_margin_percentage
-            FROM products p
-            LEFT JOIN departments d ON p.department_id = d.id
-        """)
+        # Refresh planner statistics for the rebuilt table and indexes
+        cursor.execute("ANALYZE")
         
         conn.commit()
         conn.close()
@@ -77,44 +83,35 @@ def finalize_migration():
 
 def verify_final_state():
     """Verify the final state of the database"""
+    # Collect the report and write it once at the end
+    lines = []
     try:
         conn = sqlite3.connect('products.db')
         cursor = conn.cursor()
         
-        # Check departments table
-        cursor.execute("SELECT COUNT(*) FROM departments")
-        dept_count = cursor.fetchone()[0]
-        print(f"✅ Departments: {dept_count}")
-        
-        # Check products table
-        cursor.execute("SELECT COUNT(*) FROM products")
-        product_count = cursor.fetchone()[0]
-        print(f"✅ Products: {product_count}")
-        
-        # Check foreign key relationships
-        cursor.execute("""
-            SELECT COUNT(*) FROM products p
-            JOIN departments d ON p.department_id = d.id
-        """)
-        linked_count = cursor.fetchone()[0]
-        print(f"✅ Linked products: {linked_count}")
+        # Departments, products and linked products in one round-trip
+        cursor.execute(VERIFY_COUNTS_SQL)
+        dept_count, product_count, linked_count = cursor.fetchone()
+        lines.append(f"✅ Departments: {dept_count}")
+        lines.append(f"✅ Products: {product_count}")
+        lines.append(f"✅ Linked products: {linked_count}")
         
         # Check that old department column is gone
         cursor.execute("PRAGMA table_info(products)")
         columns = [col[1] for col in cursor.fetchall()]
         if 'department' not in columns:
-            print("✅ Old department column removed")
+            lines.append("✅ Old department column removed")
         else:
-            print("❌ Old department column still exists")
+            lines.append("❌ Old department column still exists")
             return False
         
         # Check foreign key constraint
         cursor.execute("PRAGMA foreign_key_list(products)")
         fk_constraints = cursor.fetchall()
         if fk_constraints:
-            print("✅ Foreign key constraint exists")
+            lines.append("✅ Foreign key constraint exists")
         else:
-            print("❌ Foreign key constraint missing")
+            lines.append("❌ Foreign key constraint missing")
             return False
         
         # Sample data
@@ -125,16 +122,18 @@ def verify_final_state():
             LIMIT 3
         """)
         sample_data = cursor.fetchall()
-        print("✅ Sample data:")
+        lines.append("✅ Sample data:")
         for row in sample_data:
-            print(f"  - {row[0]} ({row[1]}) - {row[2]}")
+            lines.append(f"  - {row[0]} ({row[1]}) - {row[2]}")
         
         conn.close()
         return True
         
     except Exception as e:
-        print(f"❌ Verification failed: {e}")
+        lines.append(f"❌ Verification failed: {e}")
         return False
+    finally:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     print("🔧 Finalizing database migration...")
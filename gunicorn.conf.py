@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the Products REST API
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker process fills its own SQLite connection pool once gevent has
+patched it and loaded the app, so DB_POOL_SIZE should cover the concurrent
+requests a single worker handles.
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = os.getenv('API_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('API_WORKERS', str(2 * multiprocessing.cpu_count() + 1)))
+worker_class = 'gevent'
+worker_connections = int(os.getenv('API_WORKER_CONNECTIONS', '1000'))
+
+def on_starting(server):
+    """
+    Create indexes once before workers are forked. Runs in a child process so
+    the master never imports the app: gevent workers must import it only after
+    they have monkey-patched.
+    """
+    subprocess.run([sys.executable, '-c', 'from app import ensure_indexes; ensure_indexes()'])
+
+def post_worker_init(worker):
+    """Create the worker's locks and pooled connections before it accepts requests"""
+    from app import init_process
+    init_process()
@@ -7,6 +7,7 @@ This script performs the following steps:
 3. Load CSV data
 4. Verify data loading
 5. Run verification queries
+6. Optionally export the loaded products to CSV (--export PATH)
 """
 
 import sys
@@ -24,7 +25,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+# Query written out by --export: every product with its department name
+EXPORT_PRODUCTS_SQL = "SELECT * FROM products_with_margin ORDER BY id"
+
+def main(export_path=None):
     """Main function to orchestrate the data loading process"""
     db_manager = DatabaseManager()
     
@@ -45,7 +49,7 @@ def main():
         
         # Step 3: Load CSV data
         logger.info("Step 3: Loading CSV data into database...")
-        if not db_manager.load_csv_data(batch_size=1000):
+        if not db_manager.load_csv_fast(batch_size=1000):
             logger.error("Failed to load CSV data. Exiting.")
             return False
         
@@ -59,26 +63,31 @@ def main():
         logger.info("Step 5: Running verification queries...")
         results = db_manager.run_verification_queries()
         
-        # Display results
-        print("\n" + "="*50)
-        print("DATA LOADING VERIFICATION RESULTS")
-        print("="*50)
+        # Display results (built up and written in one go)
+        lines = ["", "="*50, "DATA LOADING VERIFICATION RESULTS", "="*50]
         
         for query_name, result in results.items():
-            print(f"\n{query_name}:")
+            lines.append(f"\n{query_name}:")
             if isinstance(result, int):
-                print(f"  {result}")
+                lines.append(f"  {result}")
             elif isinstance(result, list):
                 for row in result[:5]:  # Show first 5 results
-                    print(f"  {row}")
+                    lines.append(f"  {row}")
                 if len(result) > 5:
-                    print(f"  ... and {len(result) - 5} more results")
+                    lines.append(f"  ... and {len(result) - 5} more results")
             else:
-                print(f"  {result}")
+                lines.append(f"  {result}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+        
+        # Step 6: Export the loaded products
+        if export_path:
+            logger.info(f"Step 6: Exporting products to {export_path}...")
+            if not db_manager.export_query(EXPORT_PRODUCTS_SQL, export_path):
+                logger.error("Failed to export products.")
+                return False
         
-        print("\n" + "="*50)
-        print("PROCESS COMPLETED SUCCESSFULLY!")
-        print("="*50)
+        sys.stdout.write("\n".join(["", "="*50, "PROCESS COMPLETED SUCCESSFULLY!", "="*50]) + "\n")
         
         return True
         
@@ -91,5 +100,8 @@ def main():
         db_manager.disconnect()
 
 if __name__ == "__main__":
-    success = main()
+    export_path = None
+    if '--export' in sys.argv[:-1]:
+        export_path = sys.argv[sys.argv.index('--export') + 1]
+    success = main(export_path)
     sys.exit(0 if success else 1) 
\ No newline at end of file
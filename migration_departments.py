@@ -13,15 +13,31 @@ This script will:
 
 import sqlite3
 import logging
+import sys
 from datetime import datetime
+from migration_sql import (
+    MIGRATION_PRAGMAS, VERIFY_COUNTS_SQL, POPULATE_DEPARTMENTS_SQL,
+    PRODUCTS_NEW_SCHEMA_SQL, INSERT_REBUILD_SQL, PRODUCTS_INDEX_STATEMENTS,
+    PRODUCTS_VIEW_SQL,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# One row per completed step, so a rerun after a failure resumes where it stopped
+MIGRATION_STATE_SQL = """
+    CREATE TABLE IF NOT EXISTS migration_state (
+        step INTEGER PRIMARY KEY,
+        done_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
 class DepartmentMigration:
-    def __init__(self, db_path='products.db'):
+    def __init__(self, db_path='products.db', verbose=False):
         self.db_path = db_path
+        # Full-table COUNT(*) checks only run when verbose
+        self.verbose = verbose
         self.connection = None
         
     def connect(self):
@@ -29,6 +45,8 @@ class DepartmentMigration:
         try:
             self.connection = sqlite3.connect(self.db_path)
             self.connection.row_factory = sqlite3.Row
+            for pragma in MIGRATION_PRAGMAS:
+                self.connection.execute(pragma)
             logger.info("Database connection established successfully")
             return True
         except Exception as e:
@@ -41,22 +59,36 @@ class DepartmentMigration:
             self.connection.close()
             logger.info("Database connection closed")
     
-    def backup_products_table(self):
-        """Create a backup of the products table before migration"""
+    def run_step(self, step, func):
+        """Run a migration step unless migration_state records it as done"""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT 1 FROM migration_state WHERE step = ?", (step,))
+        if cursor.fetchone():
+            logger.info(f"Step {step} already completed, skipping")
+            return True
+        
+        if not func():
+            return False
+        
+        cursor.execute("INSERT OR IGNORE INTO migration_state (step) VALUES (?)", (step,))
+        self.connection.commit()
+        return True
+    
+    def backup_database(self):
+        """Snapshot the database file before migration"""
         try:
-            cursor = self.connection.cursor()
-            
-            # Create backup table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS products_backup AS 
-                SELECT * FROM products
-            """)
-            
-            self.connection.commit()
-            logger.info("Products table backed up successfully")
+            # SQLite's online backup API copies pages, not rows, so nothing is
+            # rewritten through the SQL layer or the WAL
+            backup = sqlite3.connect(f"{self.db_path}.bak")
+            try:
+                self.connection.backup(backup, pages=1024)
+            finally:
+                backup.close()
+            
+            logger.info(f"Database backed up to {self.db_path}.bak")
             return True
         except Exception as e:
-            logger.error(f"Failed to backup products table: {e}")
+            logger.error(f"Failed to backup database: {e}")
             return False
     
     def create_departments_table(self):
@@ -67,7 +99,7 @@ class DepartmentMigration:
             # Create departments table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS departments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id INTEGER PRIMARY KEY,
                     name VARCHAR(255) NOT NULL UNIQUE,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -86,38 +118,30 @@ class DepartmentMigration:
             logger.error(f"Failed to create departments table: {e}")
             return False
     
-    def extract_unique_departments(self):
-        """Extract unique department names from products table"""
+    def populate_departments_from_products(self):
+        """Populate the departments table with the unique departments in products"""
         try:
             cursor = self.connection.cursor()
             
-            # Get unique departments
-            cursor.execute("SELECT DISTINCT department FROM products WHERE department IS NOT NULL AND department != ''")
-            departments = [row[0] for row in cursor.fetchall()]
-            
-            logger.info(f"Found {len(departments)} unique departments: {departments}")
-            return departments
-        except Exception as e:
-            logger.error(f"Failed to extract unique departments: {e}")
-            return []
-    
-    def populate_departments_table(self, departments):
-        """Populate the departments table with unique departments"""
-        try:
-            cursor = self.connection.cursor()
+            # SQLite finds the distinct names and inserts them in one statement
+            cursor.execute(POPULATE_DEPARTMENTS_SQL)
+            inserted = cursor.rowcount
             
-            # Insert departments
-            for department in departments:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO departments (name) VALUES (?)
-                """, (department,))
+            cursor.execute("SELECT 1 FROM departments LIMIT 1")
+            if cursor.fetchone() is None:
+                self.connection.rollback()
+                logger.error("No departments found to migrate")
+                return False
             
             self.connection.commit()
             
+            logger.info(f"Inserted {inserted} new departments")
+            
             # Verify insertion
-            cursor.execute("SELECT COUNT(*) FROM departments")
-            count = cursor.fetchone()[0]
-            logger.info(f"Successfully populated departments table with {count} departments")
+            if self.verbose:
+                cursor.execute("SELECT COUNT(*) FROM departments")
+                count = cursor.fetchone()[0]
+                logger.info(f"Successfully populated departments table with {count} departments")
             return True
         except Exception as e:
             logger.error(f"Failed to populate departments table: {e}")
@@ -145,160 +169,61 @@ class DepartmentMigration:
         try:
             cursor = self.connection.cursor()
             
-            # Update products with department_id
+            # Update products with department_id as a single UPDATE ... FROM join
             cursor.execute("""
                 UPDATE products 
-                SET department_id = (
-                    SELECT id FROM departments 
-                    WHERE departments.name = products.department
-                )
+                SET department_id = d.id
+                FROM departments d
+                WHERE d.name = products.department
             """)
             
             self.connection.commit()
             
-            # Verify update
-            cursor.execute("SELECT COUNT(*) FROM products WHERE department_id IS NOT NULL")
-            updated_count = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM products")
-            total_count = cursor.fetchone()[0]
+            logger.info(f"Updated {cursor.rowcount} products with department_id")
             
-            logger.info(f"Updated {updated_count} out of {total_count} products with department_id")
+            # Verify update in one scan
+            if self.verbose:
+                cursor.execute("SELECT COUNT(department_id), COUNT(*) FROM products")
+                updated_count, total_count = cursor.fetchone()
+                logger.info(f"Updated {updated_count} out of {total_count} products with department_id")
             return True
         except Exception as e:
             logger.error(f"Failed to update products with department_id: {e}")
             return False
     
     def drop_old_department_column(self):
-        """Remove the old department column from products table"""
-        try:
-            cursor = self.connection.cursor()
-            
-            # SQLite doesn't support DROP COLUMN directly, so we need to recreate the table
-            # First, get the current table structure
-            cursor.execute("PRAGMA table_info(products)")
-            columns = cursor.fetchall()
-            
-            # Create new table without department column
-            column_definitions = []
-            for col in columns:
-                if col[1] != 'department':  # Skip the old department column
-                    col_def = f"{col[1]} {col[2]}"
-                    if col[5] == 1:  # Primary key
-                        col_def += " PRIMARY KEY"
-                    if col[3] == 1:  # NOT NULL
-                        col_def += " NOT NULL"
-                    if col[4] is not None and col[4] != 'CURRENT_TIMESTAMP':  # Default value
-                        col_def += f" DEFAULT {col[4]}"
-                    elif col[4] == 'CURRENT_TIMESTAMP':
-                        col_def += " DEFAULT CURRENT_TIMESTAMP"
-                    column_definitions.append(col_def)
-            
-            # Create new table
-            new_table_sql = f"""
-                CREATE TABLE products_new (
-                    {', '.join(column_definitions)}
-                )
-            """
-            cursor.execute(new_table_sql)
-            
-            # Copy data to new table
-            cursor.execute("""
-                INSERT INTO products_new 
-                SELECT id, cost, category, name, brand, retail_price, sku, 
-                       distribution_center_id, created_at, department_id
-                FROM products
-            """)
-            
-            # Drop old table and rename new table
-            cursor.execute("DROP TABLE products")
-            cursor.execute("ALTER TABLE products_new RENAME TO products")
-            
-            # Recreate indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_department_id ON products(department_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)")
-            
-            # Recreate view
-            cursor.execute("""
-                CREATE OR REPLACE VIEW products_with_margin AS
-                SELECT 
-                    p.*,
-                    d.name as department_name,
-                    (p.retail_price - p.cost) AS profit_margin,
-                    ROUND(((p.retail_price - p.cost) / p.retail_price * 100), 2) AS profit_margin_percentage
-                FROM products p
-                LEFT JOIN departments d ON p.department_id = d.id
-            """)
-            
-            self.connection.commit()
-            logger.info("Successfully removed old department column and updated table structure")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to drop old department column: {e}")
-            return False
-    
-    def add_foreign_key_constraint(self):
-        """Add foreign key constraint to ensure referential integrity"""
+        """Rebuild products into its final schema, dropping the old department column"""
         try:
             cursor = self.connection.cursor()
             
             # Enable foreign key constraints
             cursor.execute("PRAGMA foreign_keys = ON")
             
-            # Add foreign key constraint
-            cursor.execute("""
-                CREATE TABLE products_with_fk (
-                    id VARCHAR(255) PRIMARY KEY,
-                    cost DECIMAL(10, 4) NOT NULL,
-                    category VARCHAR(255) NOT NULL,
-                    name TEXT NOT NULL,
-                    brand VARCHAR(255) NOT NULL,
-                    retail_price DECIMAL(10, 4) NOT NULL,
-                    sku VARCHAR(255) NOT NULL,
-                    distribution_center_id INTEGER NOT NULL,
-                    department_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (department_id) REFERENCES departments(id)
-                )
-            """)
+            # SQLite can't drop the column or add the foreign key in place, so
+            # rebuild once: one CREATE, one INSERT SELECT, one rename
+            cursor.execute("DROP TABLE IF EXISTS products_new")
+            cursor.execute(PRODUCTS_NEW_SCHEMA_SQL)
             
-            # Copy data
-            cursor.execute("""
-                INSERT INTO products_with_fk 
-                SELECT * FROM products
-            """)
+            cursor.execute(INSERT_REBUILD_SQL)
             
-            # Drop old table and rename
+            # Drop old table and rename new table
+            cursor.execute("DROP VIEW IF EXISTS products_with_margin")
             cursor.execute("DROP TABLE products")
-            cursor.execute("ALTER TABLE products_with_fk RENAME TO products")
+            cursor.execute("ALTER TABLE products_new RENAME TO products")
             
-            # Recreate indexes
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_department_id ON products(department_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)")
+            # Build indexes after the bulk copy
+            for statement in PRODUCTS_INDEX_STATEMENTS:
+                cursor.execute(statement)
             
             # Recreate view
-            cursor.execute("""
-                CREATE OR REPLACE VIEW products_with_margin AS
-                SELECT 
-                    p.*,
-                    d.name as department_name,
-                    (p.retail_price - p.cost) AS profit_margin,
-                    ROUND(((p.retail_price - p.cost) / p.retail_price * 100), 2) AS profit_margin_percentage
-                FROM products p
-                LEFT JOIN departments d ON p.department_id = d.id
-            """)
+            cursor.execute(PRODUCTS_VIEW_SQL)
             
             self.connection.commit()
-            logger.info("Successfully added foreign key constraint")
+            logger.info("Successfully removed old department column and added foreign key constraint")
             return True
         except Exception as e:
-            logger.error(f"Failed to add foreign key constraint: {e}")
+            self.connection.rollback()
+            logger.error(f"Failed to drop old department column: {e}")
             return False
     
     def verify_migration(self):
@@ -306,23 +231,13 @@ class DepartmentMigration:
         try:
             cursor = self.connection.cursor()
             
-            # Check departments table
-            cursor.execute("SELECT COUNT(*) FROM departments")
-            dept_count = cursor.fetchone()[0]
-            logger.info(f"Departments table has {dept_count} records")
-            
-            # Check products table
-            cursor.execute("SELECT COUNT(*) FROM products")
-            product_count = cursor.fetchone()[0]
-            logger.info(f"Products table has {product_count} records")
-            
-            # Check foreign key relationships
-            cursor.execute("""
-                SELECT COUNT(*) FROM products p
-                JOIN departments d ON p.department_id = d.id
-            """)
-            linked_count = cursor.fetchone()[0]
-            logger.info(f"Products with valid department links: {linked_count}")
+            if self.verbose:
+                # Departments, products and linked products in one round-trip
+                cursor.execute(VERIFY_COUNTS_SQL)
+                dept_count, product_count, linked_count = cursor.fetchone()
+                logger.info(f"Departments table has {dept_count} records")
+                logger.info(f"Products table has {product_count} records")
+                logger.info(f"Products with valid department links: {linked_count}")
             
             # Sample data verification
             cursor.execute("""
@@ -349,42 +264,36 @@ class DepartmentMigration:
             # Step 1: Connect to database
             if not self.connect():
                 return False
+            self.connection.execute(MIGRATION_STATE_SQL)
             
             # Step 2: Backup existing data
-            if not self.backup_products_table():
+            if not self.run_step(2, self.backup_database):
                 return False
             
             # Step 3: Create departments table
-            if not self.create_departments_table():
+            if not self.run_step(3, self.create_departments_table):
                 return False
             
-            # Step 4: Extract unique departments
-            departments = self.extract_unique_departments()
-            if not departments:
-                logger.error("No departments found to migrate")
-                return False
-            
-            # Step 5: Populate departments table
-            if not self.populate_departments_table(departments):
+            # Steps 4-5: Populate departments table from the distinct product departments
+            if not self.run_step(5, self.populate_departments_from_products):
                 return False
             
             # Step 6: Add department_id column to products
-            if not self.add_department_id_to_products():
+            if not self.run_step(6, self.add_department_id_to_products):
                 return False
             
             # Step 7: Update products with department_ids
-            if not self.update_products_with_department_ids():
+            if not self.run_step(7, self.update_products_with_department_ids):
                 return False
             
-            # Step 8: Drop old department column
-            if not self.drop_old_department_column():
+            # Step 8: Rebuild products without the old department column and with the foreign key
+            if not self.run_step(8, self.drop_old_department_column):
                 return False
             
-            # Step 9: Add foreign key constraint
-            if not self.add_foreign_key_constraint():
-                return False
+            # Refresh planner statistics for the rebuilt table and indexes
+            self.connection.execute("ANALYZE")
             
-            # Step 10: Verify migration
+            # Step 9: Verify migration
             if not self.verify_migration():
                 return False
             
@@ -399,7 +308,7 @@ class DepartmentMigration:
 
 def main():
     """Main function to run the migration"""
-    migration = DepartmentMigration()
+    migration = DepartmentMigration(verbose='--verbose' in sys.argv)
     success = migration.run_migration()
     
     if success:
@@ -408,7 +317,7 @@ def main():
         print("You can now update your API to use the new structure.")
     else:
         print("❌ Migration failed. Check the logs for details.")
-        print("You can restore from the backup table if needed.")
+        print(f"You can restore from {migration.db_path}.bak if needed.")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
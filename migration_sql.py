@@ -0,0 +1,80 @@
+"""
+Shared settings and SQL for the departments migration scripts
+(migration_departments.py, complete_migration.py, finalize_migration.py,
+simple_finalize.py)
+"""
+
+# Bulk-write settings applied when the migration connects: WAL with
+# synchronous=NORMAL avoids an fsync per commit, and busy_timeout waits out
+# a running API instead of failing with "database is locked"
+MIGRATION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+]
+
+# Row counts for verification, fetched in one statement
+VERIFY_COUNTS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM departments),
+        (SELECT COUNT(*) FROM products),
+        (SELECT COUNT(*) FROM products p JOIN departments d ON p.department_id = d.id)
+"""
+
+# Copies each distinct non-empty department name from products into departments
+POPULATE_DEPARTMENTS_SQL = """
+    INSERT OR IGNORE INTO departments (name)
+    SELECT DISTINCT department FROM products
+    WHERE department IS NOT NULL AND department != ''
+"""
+
+# Final products schema: department_id references departments and the
+# margin columns are generated from cost and retail_price
+PRODUCTS_NEW_SCHEMA_SQL = """
+    CREATE TABLE products_new (
+        id TEXT PRIMARY KEY,
+        cost REAL NOT NULL,
+        category TEXT NOT NULL,
+        name TEXT NOT NULL,
+        brand TEXT NOT NULL,
+        retail_price REAL NOT NULL,
+        sku TEXT NOT NULL,
+        distribution_center_id INTEGER NOT NULL,
+        department_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        profit_margin REAL GENERATED ALWAYS AS (retail_price - cost) STORED,
+        profit_margin_percentage REAL GENERATED ALWAYS AS (round((retail_price - cost) / retail_price * 100, 2)) STORED,
+        FOREIGN KEY (department_id) REFERENCES departments(id)
+    )
+"""
+
+# Copies every kept column into products_new; the old department column is left behind
+INSERT_REBUILD_SQL = """
+    INSERT INTO products_new (id, cost, category, name, brand, retail_price, sku, distribution_center_id, department_id, created_at)
+    SELECT id, cost, category, name, brand, retail_price, sku, distribution_center_id, department_id, created_at
+    FROM products
+"""
+
+# Indexes on the rebuilt products table, created after the bulk copy
+PRODUCTS_INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category, id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_brand_id ON products(brand, id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_dept_id ON products(department_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)",
+    "CREATE INDEX IF NOT EXISTS idx_products_margin ON products((retail_price - cost) DESC)",
+]
+
+# The margins are generated columns of products, so p.* already carries them
+# (SQLite has no CREATE OR REPLACE VIEW; drop the old view first)
+PRODUCTS_VIEW_SQL = """
+    CREATE VIEW products_with_margin AS
+    SELECT
+        p.*,
+        d.name as department_name
+    FROM products p
+    LEFT JOIN departments d ON p.department_id = d.id
+"""
@@ -12,10 +12,13 @@ def test_api():
     print("🧪 Testing Milestone 5: Departments API")
     print("=" * 50)
     
+    # One keep-alive connection shared by all the checks
+    session = requests.Session()
+    
     # Test 1: Get all departments
     print("\n1. Testing GET /api/departments")
     try:
-        response = requests.get(f"{base_url}/api/departments")
+        response = session.get(f"{base_url}/api/departments")
         print(f"Status: {response.status_code}")
         if response.status_code == 200:
             data = response.json()
@@ -29,7 +32,7 @@ def test_api():
     # Test 2: Get specific department
     print("\n2. Testing GET /api/departments/1")
     try:
-        response = requests.get(f"{base_url}/api/departments/1")
+        response = session.get(f"{base_url}/api/departments/1")
         print(f"Status: {response.status_code}")
         if response.status_code == 200:
             data = response.json()
@@ -43,7 +46,7 @@ def test_api():
     # Test 3: Get products in department
     print("\n3. Testing GET /api/departments/1/products?limit=3")
     try:
-        response = requests.get(f"{base_url}/api/departments/1/products?limit=3")
+        response = session.get(f"{base_url}/api/departments/1/products?limit=3")
         print(f"Status: {response.status_code}")
         if response.status_code == 200:
             data = response.json()
@@ -62,7 +65,7 @@ def test_api():
     # Test 4: Test error handling
     print("\n4. Testing error handling - Invalid department ID")
     try:
-        response = requests.get(f"{base_url}/api/departments/999")
+        response = session.get(f"{base_url}/api/departments/999")
         print(f"Status: {response.status_code}")
         if response.status_code == 404:
             print("✅ Correctly returns 404 for invalid department")
@@ -71,6 +74,7 @@ def test_api():
     except Exception as e:
         print(f"❌ Error: {e}")
     
+    session.close()
     print("\n🎉 Testing complete!")
 
 if __name__ == "__main__":
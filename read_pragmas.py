@@ -0,0 +1,13 @@
+"""
+Connection settings shared by the read-only report scripts
+(show_sample_data.py, simple_demo.py) and test_migration.py's database checks
+"""
+
+# Per-connection cache and temp-storage settings for report queries. They
+# last only as long as the connection and leave the database file itself
+# (journal mode and the like) untouched
+READ_PRAGMAS = [
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA temp_store=MEMORY",
+]
@@ -5,12 +5,21 @@ Handles static file serving and URL routing for department pages
 """
 
 import http.server
-import socketserver
-import os
+import gzip
 import urllib.parse
 from pathlib import Path
 
+# Directory containing this script; static files are served from here
+_ROOT = Path(__file__).resolve().parent
+
+# The SPA shell (plain and gzipped), loaded once; every page route serves the same bytes
+_INDEX_BYTES = (_ROOT / 'index.html').read_bytes()
+_INDEX_GZ = gzip.compress(_INDEX_BYTES)
+
 class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(_ROOT), **kwargs)
+    
     def do_GET(self):
         # Parse the URL path
         parsed_path = urllib.parse.urlparse(self.path)
@@ -27,18 +36,35 @@ class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             # Serve index.html for root
             self.path = '/index.html'
         
+        # Serve the SPA shell from memory instead of re-reading the file
+        if self.path == '/index.html':
+            return self.send_index()
+        
         # Call the parent class method to serve the file
         return super().do_GET()
+    
+    def send_index(self):
+        """Send the cached index.html, gzipped when the client accepts it"""
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = _INDEX_GZ if use_gzip else _INDEX_BYTES
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age=60')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
 
 def run_server(port=8000):
     """Run the HTTP server on the specified port"""
-    # Change to the directory containing this script
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Create the server
-    with socketserver.TCPServer(("", port), CustomHTTPRequestHandler) as httpd:
+    # Create the server (one daemon thread per connection, so a slow client
+    # doesn't block the others; the address is reusable across restarts)
+    with http.server.ThreadingHTTPServer(("", port), CustomHTTPRequestHandler) as httpd:
         print(f"🚀 Frontend server running at http://localhost:{port}")
-        print(f"📁 Serving files from: {os.getcwd()}")
+        print(f"📁 Serving files from: {_ROOT}")
         print(f"🔗 Department pages: http://localhost:{port}/departments")
         print(f"🔗 Example: http://localhost:{port}/departments/1")
         print(f"📱 Press Ctrl+C to stop the server")
@@ -0,0 +1,18 @@
+"""
+Readiness check shared by the API test scripts (test_api.py, test_migration.py,
+test_departments_api.py)
+"""
+
+import time
+import requests
+
+def wait_for_server(url="http://localhost:5000/", timeout=5, session=requests):
+    """Poll the API until it answers instead of sleeping a fixed time; raise if it never does"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            session.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"API at {url} did not respond within {timeout} seconds")
@@ -3,83 +3,104 @@
 Simple script to show sample data from the database for demo purposes
 """
 
+import sys
 import sqlite3
+from read_pragmas import READ_PRAGMAS
+
+# Top-N queries read the summary tables written by sqlite_version.py's
+# load when they exist, and fall back to grouping products otherwise
+TOP_CATEGORIES_SQL = "SELECT category, cnt FROM category_summary ORDER BY cnt DESC LIMIT 5"
+TOP_BRANDS_SQL = "SELECT brand, cnt FROM brand_summary ORDER BY cnt DESC LIMIT 5"
+TOP_CATEGORIES_FALLBACK_SQL = """
+    SELECT category, COUNT(*) as count 
+    FROM products 
+    GROUP BY category 
+    ORDER BY count DESC 
+    LIMIT 5
+"""
+TOP_BRANDS_FALLBACK_SQL = """
+    SELECT brand, COUNT(*) as count 
+    FROM products 
+    GROUP BY brand 
+    ORDER BY count DESC 
+    LIMIT 5
+"""
 
 def show_sample_data():
     """Display sample data from the products table"""
+    # Collect the report and write it once at the end
+    lines = []
     try:
         # Connect to database
         conn = sqlite3.connect('products.db')
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
         cursor = conn.cursor()
         
-        print("=" * 80)
-        print("SAMPLE DATA FROM PRODUCTS TABLE")
-        print("=" * 80)
+        lines.append("=" * 80)
+        lines.append("SAMPLE DATA FROM PRODUCTS TABLE")
+        lines.append("=" * 80)
         
         # Show total count
         cursor.execute("SELECT COUNT(*) FROM products")
         total_count = cursor.fetchone()[0]
-        print(f"Total Products in Database: {total_count:,}")
-        print()
+        lines.append(f"Total Products in Database: {total_count:,}")
+        lines.append("")
         
         # Show sample records
         cursor.execute("""
-            SELECT id, name, brand, retail_price, cost, category, department 
+            SELECT id, name, brand, retail_price, cost, category, department,
+                   (retail_price - cost) AS profit_margin,
+                   CASE WHEN retail_price > 0
+                        THEN (retail_price - cost) / retail_price * 100
+                        ELSE 0 END AS margin_percentage
             FROM products 
             LIMIT 10
         """)
         
         rows = cursor.fetchall()
-        print("Sample Products:")
-        print("-" * 80)
+        lines.append("Sample Products:")
+        lines.append("-" * 80)
         
         for i, row in enumerate(rows, 1):
-            id_val, name, brand, retail_price, cost, category, department = row
-            profit_margin = retail_price - cost
-            margin_percentage = (profit_margin / retail_price) * 100 if retail_price > 0 else 0
+            id_val, name, brand, retail_price, cost, category, department, profit_margin, margin_percentage = row
             
-            print(f"{i}. ID: {id_val}")
-            print(f"   Name: {name}")
-            print(f"   Brand: {brand}")
-            print(f"   Category: {category}")
-            print(f"   Department: {department}")
-            print(f"   Cost: ${cost:.2f}")
-            print(f"   Retail Price: ${retail_price:.2f}")
-            print(f"   Profit Margin: ${profit_margin:.2f} ({margin_percentage:.1f}%)")
-            print()
+            lines.append(f"{i}. ID: {id_val}")
+            lines.append(f"   Name: {name}")
+            lines.append(f"   Brand: {brand}")
+            lines.append(f"   Category: {category}")
+            lines.append(f"   Department: {department}")
+            lines.append(f"   Cost: ${cost:.2f}")
+            lines.append(f"   Retail Price: ${retail_price:.2f}")
+            lines.append(f"   Profit Margin: ${profit_margin:.2f} ({margin_percentage:.1f}%)")
+            lines.append("")
         
         # Show some statistics
-        print("=" * 80)
-        print("DATABASE STATISTICS")
-        print("=" * 80)
+        lines.append("=" * 80)
+        lines.append("DATABASE STATISTICS")
+        lines.append("=" * 80)
         
-        # Categories
         cursor.execute("""
-            SELECT category, COUNT(*) as count 
-            FROM products 
-            GROUP BY category 
-            ORDER BY count DESC 
-            LIMIT 5
+            SELECT COUNT(*) FROM sqlite_master
+            WHERE type = 'table' AND name IN ('category_summary', 'brand_summary')
         """)
-        print("Top 5 Categories:")
+        has_summaries = cursor.fetchone()[0] == 2
+        
+        # Categories
+        cursor.execute(TOP_CATEGORIES_SQL if has_summaries else TOP_CATEGORIES_FALLBACK_SQL)
+        lines.append("Top 5 Categories:")
         for row in cursor.fetchall():
-            print(f"  {row[0]}: {row[1]:,} products")
+            lines.append(f"  {row[0]}: {row[1]:,} products")
         
-        print()
+        lines.append("")
         
         # Brands
-        cursor.execute("""
-            SELECT brand, COUNT(*) as count 
-            FROM products 
-            GROUP BY brand 
-            ORDER BY count DESC 
-            LIMIT 5
-        """)
-        print("Top 5 Brands:")
+        cursor.execute(TOP_BRANDS_SQL if has_summaries else TOP_BRANDS_FALLBACK_SQL)
+        lines.append("Top 5 Brands:")
         for row in cursor.fetchall():
-            print(f"  {row[0]}: {row[1]:,} products")
+            lines.append(f"  {row[0]}: {row[1]:,} products")
         
-        print()
+        lines.append("")
         
         # Price ranges
         cursor.execute("""
@@ -90,15 +111,17 @@ def show_sample_data():
             FROM products
         """)
         price_stats = cursor.fetchone()
-        print("Price Statistics:")
-        print(f"  Min Price: ${price_stats[0]:.2f}")
-        print(f"  Max Price: ${price_stats[1]:.2f}")
-        print(f"  Average Price: ${price_stats[2]:.2f}")
+        lines.append("Price Statistics:")
+        lines.append(f"  Min Price: ${price_stats[0]:.2f}")
+        lines.append(f"  Max Price: ${price_stats[1]:.2f}")
+        lines.append(f"  Average Price: ${price_stats[2]:.2f}")
         
         conn.close()
         
     except Exception as e:
-        print(f"Error: {e}")
+        lines.append(f"Error: {e}")
+    finally:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     show_sample_data() 
\ No newline at end of file
@@ -1,35 +1,42 @@
 #!/usr/bin/env python3
+import sys
 import sqlite3
+from read_pragmas import READ_PRAGMAS
 
-print("🎯 MILESTONE 4 DEMO: REFACTOR DEPARTMENTS TABLE")
-print("=" * 50)
+# Collect the report and write it once at the end
+lines = []
+
+lines.append("🎯 MILESTONE 4 DEMO: REFACTOR DEPARTMENTS TABLE")
+lines.append("=" * 50)
 
 # Connect to database
 conn = sqlite3.connect('products.db')
+for pragma in READ_PRAGMAS:
+    conn.execute(pragma)
 cursor = conn.cursor()
 
 # 1. Show departments table
-print("\n1. 📊 DEPARTMENTS TABLE")
-print("-" * 30)
+lines.append("\n1. 📊 DEPARTMENTS TABLE")
+lines.append("-" * 30)
 cursor.execute("SELECT * FROM departments")
 departments = cursor.fetchall()
-print("ID | Name")
-print("---|------")
+lines.append("ID | Name")
+lines.append("---|------")
 for dept in departments:
-    print(f"{dept[0]} | {dept[1]}")
-print(f"Total departments: {len(departments)}")
+    lines.append(f"{dept[0]} | {dept[1]}")
+lines.append(f"Total departments: {len(departments)}")
 
 # 2. Show products table structure
-print("\n2. 📦 PRODUCTS TABLE STRUCTURE")
-print("-" * 30)
+lines.append("\n2. 📦 PRODUCTS TABLE STRUCTURE")
+lines.append("-" * 30)
 cursor.execute("PRAGMA table_info(products)")
 columns = cursor.fetchall()
 for col in columns:
-    print(f"- {col[1]} ({col[2]})")
+    lines.append(f"- {col[1]} ({col[2]})")
 
 # 3. Show JOIN query results
-print("\n3. 🔗 JOIN QUERY: Products by Department")
-print("-" * 30)
+lines.append("\n3. 🔗 JOIN QUERY: Products by Department")
+lines.append("-" * 30)
 cursor.execute("""
     SELECT d.name, COUNT(*) as count
     FROM products p
@@ -38,14 +45,14 @@ cursor.execute("""
     ORDER BY count DESC
 """)
 results = cursor.fetchall()
-print("Department | Count")
-print("-----------|------")
+lines.append("Department | Count")
+lines.append("-----------|------")
 for row in results:
-    print(f"{row[0]:<10} | {row[1]}")
+    lines.append(f"{row[0]:<10} | {row[1]}")
 
 # 4. Show sample products with department info
-print("\n4. 📋 SAMPLE PRODUCTS WITH DEPARTMENT INFO")
-print("-" * 30)
+lines.append("\n4. 📋 SAMPLE PRODUCTS WITH DEPARTMENT INFO")
+lines.append("-" * 30)
 cursor.execute("""
     SELECT p.name, p.brand, p.retail_price, d.name as dept
     FROM products p
@@ -53,29 +60,32 @@ cursor.execute("""
     LIMIT 5
 """)
 products = cursor.fetchall()
-print("Product Name (truncated) | Brand | Price | Department")
-print("-" * 55)
+lines.append("Product Name (truncated) | Brand | Price | Department")
+lines.append("-" * 55)
 for prod in products:
-    print(f"{prod[0][:25]:<25} | {prod[1]:<5} | ${prod[2]:<5.2f} | {prod[3]}")
+    lines.append(f"{prod[0][:25]:<25} | {prod[1]:<5} | ${prod[2]:<5.2f} | {prod[3]}")
 
 # 5. Show total counts
-print("\n5. 📊 DATABASE STATISTICS")
-print("-" * 30)
-cursor.execute("SELECT COUNT(*) FROM products")
-total_products = cursor.fetchone()[0]
-cursor.execute("SELECT COUNT(*) FROM departments")
-total_departments = cursor.fetchone()[0]
-cursor.execute("SELECT COUNT(*) FROM products p JOIN departments d ON p.department_id = d.id")
-linked_products = cursor.fetchone()[0]
+lines.append("\n5. 📊 DATABASE STATISTICS")
+lines.append("-" * 30)
+cursor.execute("""
+    SELECT
+        (SELECT COUNT(*) FROM products),
+        (SELECT COUNT(*) FROM departments),
+        (SELECT COUNT(*) FROM products p JOIN departments d ON p.department_id = d.id)
+""")
+total_products, total_departments, linked_products = cursor.fetchone()
 
-print(f"Total products: {total_products}")
-print(f"Total departments: {total_departments}")
-print(f"Products with department links: {linked_products}")
-print(f"Data integrity: {'✅' if total_products == linked_products else '❌'}")
+lines.append(f"Total products: {total_products}")
+lines.append(f"Total departments: {total_departments}")
+lines.append(f"Products with department links: {linked_products}")
+lines.append(f"Data integrity: {'✅' if total_products == linked_products else '❌'}")
 
 conn.close()
 
-print("\n🎉 DEMO COMPLETE!")
-print("✅ Database refactoring successful")
-print("✅ Foreign key relationships established")
-print("✅ All data preserved") 
\ No newline at end of file
+lines.append("\n🎉 DEMO COMPLETE!")
+lines.append("✅ Database refactoring successful")
+lines.append("✅ Foreign key relationships established")
+lines.append("✅ All data preserved")
+
+sys.stdout.write("\n".join(lines) + "\n")
@@ -3,11 +3,19 @@
 Simple test for Milestone 5 Departments API using built-in libraries
 """
 
-import urllib.request
+import http.client
 import json
 
+def get(conn, path):
+    """GET a path on the shared connection and return (status, parsed JSON)"""
+    conn.request("GET", path)
+    response = conn.getresponse()
+    # Read the whole body so the connection can be reused for the next request
+    return response.status, json.loads(response.read().decode())
+
 def test_api():
-    base_url = "http://localhost:5000"
+    # One keep-alive connection shared by all the checks
+    conn = http.client.HTTPConnection("localhost", 5000, timeout=10)
     
     print("🧪 Testing Milestone 5: Departments API")
     print("=" * 50)
@@ -15,51 +23,58 @@ def test_api():
     # Test 1: Get all departments
     print("\n1. Testing GET /api/departments")
     try:
-        with urllib.request.urlopen(f"{base_url}/api/departments") as response:
-            data = json.loads(response.read().decode())
+        status, data = get(conn, "/api/departments")
+        if status == 200:
             print("✅ Success! Status: 200")
             print("Response:")
             print(json.dumps(data, indent=2))
+        else:
+            print(f"❌ Failed: Status {status}")
     except Exception as e:
         print(f"❌ Error: {e}")
     
     # Test 2: Get specific department
     print("\n2. Testing GET /api/departments/1")
     try:
-        with urllib.request.urlopen(f"{base_url}/api/departments/1") as response:
-            data = json.loads(response.read().decode())
+        status, data = get(conn, "/api/departments/1")
+        if status == 200:
             print("✅ Success! Status: 200")
             print("Response:")
             print(json.dumps(data, indent=2))
+        else:
+            print(f"❌ Failed: Status {status}")
     except Exception as e:
         print(f"❌ Error: {e}")
     
     # Test 3: Get products in department
     print("\n3. Testing GET /api/departments/1/products?limit=3")
     try:
-        with urllib.request.urlopen(f"{base_url}/api/departments/1/products?limit=3") as response:
-            data = json.loads(response.read().decode())
+        status, data = get(conn, "/api/departments/1/products?limit=3")
+        if status == 200:
             print("✅ Success! Status: 200")
             print("Response structure:")
             print(f"  Department: {data.get('department', 'N/A')}")
             print(f"  Products count: {len(data.get('products', []))}")
             print(f"  Total count: {data.get('pagination', {}).get('total_count', 'N/A')}")
+        else:
+            print(f"❌ Failed: Status {status}")
     except Exception as e:
         print(f"❌ Error: {e}")
     
     # Test 4: Test error handling
     print("\n4. Testing error handling - Invalid department ID")
     try:
-        with urllib.request.urlopen(f"{base_url}/api/departments/999") as response:
-            print("❌ Expected 404, but got success")
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
+        status, data = get(conn, "/api/departments/999")
+        if status == 404:
             print("✅ Correctly returns 404 for invalid department")
+        elif status == 200:
+            print("❌ Expected 404, but got success")
         else:
-            print(f"❌ Expected 404, got {e.code}")
+            print(f"❌ Expected 404, got {status}")
     except Exception as e:
         print(f"❌ Error: {e}")
     
+    conn.close()
     print("\n🎉 Testing complete!")
 
 if __name__ == "__main__":
@@ -4,16 +4,51 @@ SQLite version of the database manager for easier testing.
 This version uses SQLite instead of PostgreSQL for simplicity.
 """
 
-import pandas as pd
+import csv
+import math
 import sqlite3
 import logging
 import os
 from datetime import datetime
+from itertools import islice
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Connection settings for bulk CSV loading (fewer fsyncs, in-memory temp
+# storage, and a busy timeout in case the API has the database open)
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-200000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+]
+
+# CSV columns loaded into products, in INSERT parameter order
+PRODUCT_COLUMNS = ['id', 'cost', 'category', 'name', 'brand', 'retail_price', 'department', 'sku', 'distribution_center_id']
+INSERT_PRODUCT_SQL = """
+    INSERT INTO products (id, cost, category, name, brand, retail_price, department, sku, distribution_center_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Chunk progress is logged once every this many chunks
+PROGRESS_LOG_CHUNKS = 32
+
+# Per-category and per-brand product counts, rebuilt at the end of every
+# load so top-N reports read a few hundred summary rows instead of
+# grouping the whole products table
+SUMMARY_TABLES_SQL = [
+    "DROP TABLE IF EXISTS category_summary",
+    "CREATE TABLE category_summary AS SELECT category, COUNT(*) AS cnt FROM products GROUP BY category",
+    "CREATE INDEX idx_category_summary_cnt ON category_summary(cnt DESC)",
+    "DROP TABLE IF EXISTS brand_summary",
+    "CREATE TABLE brand_summary AS SELECT brand, COUNT(*) AS cnt FROM products GROUP BY brand",
+    "CREATE INDEX idx_brand_summary_cnt ON brand_summary(cnt DESC)",
+]
+
 class SQLiteDatabaseManager:
     def __init__(self, db_path='products.db'):
         self.db_path = db_path
@@ -23,6 +58,8 @@ class SQLiteDatabaseManager:
         """Establish SQLite database connection"""
         try:
             self.connection = sqlite3.connect(self.db_path)
+            for pragma in CONNECTION_PRAGMAS:
+                self.connection.execute(pragma)
             logger.info(f"SQLite database connection established: {self.db_path}")
             return True
         except Exception as e:
@@ -32,6 +69,8 @@ class SQLiteDatabaseManager:
     def disconnect(self):
         """Close database connection"""
         if self.connection:
+            # Let SQLite refresh any statistics the session's queries showed to be stale
+            self.connection.execute("PRAGMA optimize")
             self.connection.close()
         logger.info("SQLite database connection closed")
     
@@ -52,11 +91,12 @@ class SQLiteDatabaseManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
             
-            CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
-            CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand);
+            CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category, id);
+            CREATE INDEX IF NOT EXISTS idx_products_brand_id ON products(brand, id);
             CREATE INDEX IF NOT EXISTS idx_products_department ON products(department);
             CREATE INDEX IF NOT EXISTS idx_products_distribution_center ON products(distribution_center_id);
             CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+            CREATE INDEX IF NOT EXISTS idx_products_margin ON products((retail_price - cost) DESC);
             """
             
             self.connection.executescript(schema_sql)
@@ -67,7 +107,7 @@ class SQLiteDatabaseManager:
             logger.error(f"Failed to create schema: {e}")
             return False
     
-    def load_csv_data(self, batch_size=1000):
+    def load_csv_data(self, batch_size=50_000):
         """Load CSV data into SQLite database in batches"""
         try:
             logger.info(f"Starting to load data from products.csv")
@@ -76,48 +116,95 @@ class SQLiteDatabaseManager:
             chunk_count = 0
             total_rows = 0
             
-            for chunk in pd.read_csv('products.csv', chunksize=batch_size):
-                # Clean and prepare data
-                chunk = self._prepare_data(chunk)
+            # The table is rebuilt from the CSV, so a failed load is simply rerun:
+            # skip fsyncs and write rows once instead of through the WAL first.
+            # WAL can only be left while no other connection has the database
+            # open (e.g. the API); otherwise the load stays in WAL
+            self.connection.execute("PRAGMA synchronous=OFF")
+            try:
+                self.connection.execute("PRAGMA journal_mode=MEMORY")
+            except sqlite3.OperationalError as e:
+                logger.info(f"Loading in WAL mode: {e}")
+            
+            with open('products.csv', newline='') as f:
+                rows = self._clean_csv_rows(csv.reader(f))
                 
-                # Insert chunk into database
-                chunk.to_sql('products', self.connection, if_exists='append', index=False, method='multi')
+                # All chunks go in one transaction, so the load commits once
+                self.connection.execute("BEGIN")
                 
-                chunk_count += 1
-                total_rows += len(chunk)
-                logger.info(f"Loaded chunk {chunk_count}: {len(chunk)} rows (Total: {total_rows})")
+                while True:
+                    chunk = list(islice(rows, batch_size))
+                    if not chunk:
+                        break
+                    
+                    # Insert chunk into database through one prepared INSERT,
+                    # compiled once and reused for every row
+                    self.connection.executemany(INSERT_PRODUCT_SQL, chunk)
+                    
+                    chunk_count += 1
+                    total_rows += len(chunk)
+                    if chunk_count % PROGRESS_LOG_CHUNKS == 0:
+                        logger.info(f"Loaded chunk {chunk_count}: {len(chunk)} rows (Total: {total_rows})")
+            
+            # Rebuild the summary tables inside the load transaction
+            for statement in SUMMARY_TABLES_SQL:
+                self.connection.execute(statement)
+            
+            # Refresh planner statistics for the freshly loaded table
+            self.connection.execute("ANALYZE")
             
+            self.connection.commit()
             logger.info(f"Data loading completed. Total rows loaded: {total_rows}")
             return True
             
         except Exception as e:
+            self.connection.rollback()
             logger.error(f"Failed to load CSV data: {e}")
             return False
+        finally:
+            # Back to the connection's normal WAL settings
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
     
-    def _prepare_data(self, df):
-        """Prepare and clean the dataframe before insertion"""
+    def _clean_csv_rows(self, reader):
+        """Yield typed product tuples from CSV rows, skipping rows without an id or valid prices"""
         # Ensure all required columns exist
-        required_columns = ['id', 'cost', 'category', 'name', 'brand', 'retail_price', 'department', 'sku', 'distribution_center_id']
-        
-        for col in required_columns:
-            if col not in df.columns:
+        header = next(reader)
+        for col in PRODUCT_COLUMNS:
+            if col not in header:
                 raise ValueError(f"Missing required column: {col}")
+        positions = [header.index(col) for col in PRODUCT_COLUMNS]
+        
+        skipped = 0
+        for row in reader:
+            # Short rows would raise IndexError mid-load; skip them like bad values
+            if len(row) < len(header):
+                skipped += 1
+                continue
+            id_val, cost, category, name, brand, retail_price, department, sku, distribution_center_id = (
+                row[i] for i in positions
+            )
+            if not id_val:
+                skipped += 1
+                continue
+            try:
+                cost = float(cost)
+                retail_price = float(retail_price)
+                distribution_center_id = int(distribution_center_id)
+            except ValueError:
+                skipped += 1
+                continue
+            # nan, inf and overflowing values like 1e400 parse but are not prices
+            if not (math.isfinite(cost) and math.isfinite(retail_price)):
+                skipped += 1
+                continue
+            
+            # Text columns are NOT NULL; blank fields are stored as 'nan' like the existing rows
+            yield (id_val, cost, category or 'nan', name or 'nan', brand or 'nan',
+                   retail_price, department or 'nan', sku or 'nan', distribution_center_id)
         
-        # Clean data types
-        df['id'] = df['id'].astype(str)
-        df['cost'] = pd.to_numeric(df['cost'], errors='coerce')
-        df['category'] = df['category'].astype(str)
-        df['name'] = df['name'].astype(str)
-        df['brand'] = df['brand'].astype(str)
-        df['retail_price'] = pd.to_numeric(df['retail_price'], errors='coerce')
-        df['department'] = df['department'].astype(str)
-        df['sku'] = df['sku'].astype(str)
-        df['distribution_center_id'] = pd.to_numeric(df['distribution_center_id'], errors='coerce')
-        
-        # Remove rows with null values in critical fields
-        df = df.dropna(subset=['id', 'cost', 'retail_price'])
-        
-        return df
+        if skipped:
+            logger.info(f"Skipped {skipped} malformed CSV rows")
     
     def verify_data_loading(self):
         """Verify that data was loaded correctly"""
@@ -134,12 +221,13 @@ class SQLiteDatabaseManager:
             invalid_prices = cursor.fetchone()[0]
             logger.info(f"Products with invalid prices: {invalid_prices}")
             
-            # Sample data verification
-            cursor.execute("SELECT * FROM products LIMIT 5")
+            # Sample data verification, reading only the logged columns by name
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("SELECT id, name, brand, retail_price FROM products LIMIT 5")
             sample_data = cursor.fetchall()
             logger.info("Sample data from database:")
             for row in sample_data:
-                logger.info(f"  ID: {row[0]}, Name: {row[3]}, Brand: {row[4]}, Price: {row[5]}")
+                logger.info(f"  ID: {row['id']}, Name: {row['name']}, Brand: {row['brand']}, Price: {row['retail_price']}")
             
             return True
             
@@ -154,23 +242,29 @@ class SQLiteDatabaseManager:
             "Products by Category": "SELECT category, COUNT(*) as count FROM products GROUP BY category ORDER BY count DESC LIMIT 10",
             "Products by Brand": "SELECT brand, COUNT(*) as count FROM products GROUP BY brand ORDER BY count DESC LIMIT 10",
             "Average Price by Category": "SELECT category, AVG(retail_price) as avg_price FROM products GROUP BY category ORDER BY avg_price DESC LIMIT 10",
-            "Products with Highest Profit Margin": "SELECT name, brand, retail_price, cost, (retail_price - cost) as profit_margin FROM products ORDER BY (retail_price - cost) DESC LIMIT 10"
+            "Products with Highest Profit Margin": "SELECT name, brand, retail_price, cost, (retail_price - cost) as profit_margin FROM products ORDER BY profit_margin DESC LIMIT 10"
         }
         
         results = {}
         cursor = self.connection.cursor()
         
-        for query_name, query in queries.items():
-            try:
-                cursor.execute(query)
-                if query_name in ["Total Products"]:
-                    results[query_name] = cursor.fetchone()[0]
-                else:
-                    results[query_name] = cursor.fetchall()
-                logger.info(f"Query '{query_name}' executed successfully")
-            except Exception as e:
-                logger.error(f"Failed to execute query '{query_name}': {e}")
-                results[query_name] = None
+        # One read transaction: every query sees the same snapshot and the
+        # shared lock is taken once instead of per statement
+        cursor.execute("BEGIN")
+        try:
+            for query_name, query in queries.items():
+                try:
+                    cursor.execute(query)
+                    if query_name in ["Total Products"]:
+                        results[query_name] = cursor.fetchone()[0]
+                    else:
+                        results[query_name] = cursor.fetchall()
+                    logger.info(f"Query '{query_name}' executed successfully")
+                except Exception as e:
+                    logger.error(f"Failed to execute query '{query_name}': {e}")
+                    results[query_name] = None
+        finally:
+            self.connection.commit()
         
         return results
 
@@ -195,7 +289,7 @@ def main():
         
         # Step 3: Load CSV data
         logger.info("Step 3: Loading CSV data into database...")
-        if not db_manager.load_csv_data(batch_size=1000):
+        if not db_manager.load_csv_data(batch_size=50_000):
             logger.error("Failed to load CSV data. Exiting.")
             return False
         
@@ -5,7 +5,7 @@ Test API with new database structure
 
 import requests
 import json
-import time
+from server_wait import wait_for_server
 
 def test_api():
     """Test the API endpoints"""
@@ -13,9 +13,12 @@ def test_api():
     
     print("🧪 Testing API with new database structure...\n")
     
+    # One keep-alive connection shared by all the checks
+    session = requests.Session()
+    
     # Test 1: Home endpoint
     try:
-        response = requests.get(f"{base_url}/")
+        response = session.get(f"{base_url}/")
         if response.status_code == 200:
             data = response.json()
             print("✅ Home endpoint working")
@@ -29,7 +32,7 @@ def test_api():
     
     # Test 2: Departments endpoint
     try:
-        response = requests.get(f"{base_url}/api/departments")
+        response = session.get(f"{base_url}/api/departments")
         if response.status_code == 200:
             data = response.json()
             departments = data.get('departments', [])
@@ -45,7 +48,7 @@ def test_api():
     
     # Test 3: Products endpoint
     try:
-        response = requests.get(f"{base_url}/api/products?limit=3")
+        response = session.get(f"{base_url}/api/products?limit=3")
         if response.status_code == 200:
             data = response.json()
             products = data.get('products', [])
@@ -68,7 +71,7 @@ def test_api():
     
     # Test 4: Products by department filter
     try:
-        response = requests.get(f"{base_url}/api/products?department_name=Women&limit=2")
+        response = session.get(f"{base_url}/api/products?department_name=Women&limit=2")
         if response.status_code == 200:
             data = response.json()
             products = data.get('products', [])
@@ -82,7 +85,7 @@ def test_api():
     
     # Test 5: Stats endpoint
     try:
-        response = requests.get(f"{base_url}/api/products/stats")
+        response = session.get(f"{base_url}/api/products/stats")
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Stats endpoint working")
@@ -99,8 +102,8 @@ def test_api():
     return True
 
 if __name__ == "__main__":
-    # Wait a moment for the server to start
-    time.sleep(2)
+    # Wait for server to be ready
+    wait_for_server()
     
     if test_api():
         print("\n✅ Database refactoring is complete and working!")
@@ -4,9 +4,23 @@ Test script for Milestone 5: Departments API
 Tests all required department endpoints and response formats
 """
 
+import os
+import orjson
 import requests
 import json
-import time
+from concurrent.futures import ThreadPoolExecutor
+from server_wait import wait_for_server
+
+# Keep-alive connections shared by every test, sized for the parallel probes
+session = requests.Session()
+session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+# Set TEST_VERBOSE=1 to also dump full product listings
+VERBOSE = os.environ.get('TEST_VERBOSE') == '1'
+
+def rjson(response):
+    """Parse a JSON response body straight from bytes with orjson"""
+    return orjson.loads(response.content)
 
 def test_departments_list():
     """Test GET /api/departments - List all departments"""
@@ -16,10 +30,10 @@ def test_departments_list():
     
     try:
         # Test default format (Milestone 5 requirement)
-        response = requests.get("http://localhost:5000/api/departments")
+        response = session.get("http://localhost:5000/api/departments")
         
         if response.status_code == 200:
-            data = response.json()
+            data = rjson(response)
             departments = data.get('departments', [])
             
             print(f"✅ Status: {response.status_code}")
@@ -60,10 +74,10 @@ def test_department_details():
     
     try:
         # Test with valid department ID (1)
-        response = requests.get("http://localhost:5000/api/departments/1")
+        response = session.get("http://localhost:5000/api/departments/1")
         
         if response.status_code == 200:
-            data = response.json()
+            data = rjson(response)
             
             print(f"✅ Status: {response.status_code}")
             print("Response:")
@@ -84,7 +98,7 @@ def test_department_details():
         
         # Test with invalid department ID
         print("\nTesting invalid department ID...")
-        response = requests.get("http://localhost:5000/api/departments/999")
+        response = session.get("http://localhost:5000/api/departments/999")
         
         if response.status_code == 404:
             print("✅ Correctly returns 404 for invalid department")
@@ -106,10 +120,10 @@ def test_department_products():
     
     try:
         # Test with valid department ID (1)
-        response = requests.get("http://localhost:5000/api/departments/1/products?limit=3")
+        response = session.get("http://localhost:5000/api/departments/1/products?limit=3")
         
         if response.status_code == 200:
-            data = response.json()
+            data = rjson(response)
             
             print(f"✅ Status: {response.status_code}")
             print("Response structure:")
@@ -117,8 +131,9 @@ def test_department_products():
             print(f"  - Products count: {len(data.get('products', []))}")
             print(f"  - Total count: {data.get('pagination', {}).get('total_count', 'N/A')}")
             
-            print("\nSample response:")
-            print(json.dumps(data, indent=2))
+            if VERBOSE:
+                print("\nSample response:")
+                print(json.dumps(data, indent=2))
             
             # Verify response format
             if 'department' in data and 'products' in data and 'pagination' in data:
@@ -146,7 +161,7 @@ def test_department_products():
         
         # Test with invalid department ID
         print("\nTesting invalid department ID...")
-        response = requests.get("http://localhost:5000/api/departments/999/products")
+        response = session.get("http://localhost:5000/api/departments/999/products")
         
         if response.status_code == 404:
             print("✅ Correctly returns 404 for invalid department")
@@ -167,11 +182,17 @@ def test_department_products_filtering():
     print("=" * 60)
     
     try:
+        # The category and brand filters are independent, so fetch them together
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            response, brand_response = executor.map(session.get, [
+                "http://localhost:5000/api/departments/1/products?category=Accessories&limit=2",
+                "http://localhost:5000/api/departments/1/products?brand=MG&limit=2"
+            ])
+        
         # Test category filtering within department
-        response = requests.get("http://localhost:5000/api/departments/1/products?category=Accessories&limit=2")
         
         if response.status_code == 200:
-            data = response.json()
+            data = rjson(response)
             products = data.get('products', [])
             
             print(f"✅ Category filter: Found {len(products)} products in Accessories category")
@@ -179,10 +200,10 @@ def test_department_products_filtering():
             print(f"   Total in category: {data.get('pagination', {}).get('total_count', 'N/A')}")
             
             # Test brand filtering within department
-            response = requests.get("http://localhost:5000/api/departments/1/products?brand=MG&limit=2")
+            response = brand_response
             
             if response.status_code == 200:
-                data = response.json()
+                data = rjson(response)
                 products = data.get('products', [])
                 
                 print(f"✅ Brand filter: Found {len(products)} products from MG brand")
@@ -215,9 +236,10 @@ def test_error_handling():
             "/api/departments/999/products"
         ]
         
-        for endpoint in endpoints:
-            response = requests.get(f"http://localhost:5000{endpoint}")
-            
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            responses = list(executor.map(session.get, [f"http://localhost:5000{endpoint}" for endpoint in endpoints]))
+        
+        for endpoint, response in zip(endpoints, responses):
             if response.status_code == 404:
                 print(f"✅ {endpoint}: Correctly returns 404")
             else:
@@ -225,10 +247,10 @@ def test_error_handling():
                 return False
         
         # Test invalid query parameters
-        response = requests.get("http://localhost:5000/api/departments/1/products?limit=1000")
+        response = session.get("http://localhost:5000/api/departments/1/products?limit=1000")
         
         if response.status_code == 200:
-            data = response.json()
+            data = rjson(response)
             # Should limit to max 100 items
             products = data.get('products', [])
             if len(products) <= 100:
@@ -253,7 +275,7 @@ def main():
     print("Testing all required department endpoints...")
     
     # Wait for server to be ready
-    time.sleep(2)
+    wait_for_server(session=session)
     
     tests = [
         ("Departments List", test_departments_list),
@@ -8,9 +8,11 @@ import json
 
 def test_departments_api():
     """Test the departments API"""
+    # One keep-alive connection for both requests
+    session = requests.Session()
     try:
         # Test the departments endpoint
-        response = requests.get('http://localhost:5000/api/departments')
+        response = session.get('http://localhost:5000/api/departments')
         
         if response.status_code == 200:
             data = response.json()
@@ -29,7 +31,7 @@ def test_departments_api():
                 first_dept = departments[0]
                 print(f"\n🔍 Testing department: {first_dept['name']}")
                 
-                dept_response = requests.get(f'http://localhost:5000/api/departments/{first_dept["id"]}/products?limit=3')
+                dept_response = session.get(f'http://localhost:5000/api/departments/{first_dept["id"]}/products?limit=3')
                 if dept_response.status_code == 200:
                     dept_data = dept_response.json()
                     print(f"   Department: {dept_data['department']}")
@@ -49,6 +51,8 @@ def test_departments_api():
         print("❌ Could not connect to API. Make sure the Flask server is running on port 5000.")
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        session.close()
 
 if __name__ == "__main__":
     test_departments_api() 
\ No newline at end of file
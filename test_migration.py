@@ -7,8 +7,31 @@ Tests the new database structure with departments table
 import sqlite3
 import json
 import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from migration_departments import DepartmentMigration
+from read_pragmas import READ_PRAGMAS
+from server_wait import wait_for_server
+
+# Every count test_data_integrity checks, fetched in one statement
+INTEGRITY_COUNTS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM products),
+        (SELECT COUNT(*) FROM departments),
+        (SELECT COUNT(*) FROM products WHERE department_id IS NULL),
+        (SELECT COUNT(*) FROM products p JOIN departments d ON p.department_id = d.id)
+"""
+
+@contextmanager
+def ro_conn(db_path='products.db'):
+    """Open the database read-only for the structure, integrity and query checks"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
+        yield conn
+    finally:
+        conn.close()
 
 def test_migration():
     """Test the database migration process"""
@@ -25,12 +48,11 @@ def test_migration():
     print("✅ Migration completed successfully!")
     return True
 
-def test_database_structure():
+def test_database_structure(conn):
     """Test the new database structure"""
     print("\n🔍 Testing Database Structure...")
     
     try:
-        conn = sqlite3.connect('products.db')
         cursor = conn.cursor()
         
         # Check if departments table exists
@@ -58,56 +80,43 @@ def test_database_structure():
             return False
         
         print("✅ Database structure is correct!")
-        conn.close()
         return True
         
     except Exception as e:
         print(f"❌ Database structure test failed: {e}")
         return False
 
-def test_data_integrity():
+def test_data_integrity(conn):
     """Test data integrity after migration"""
     print("\n📊 Testing Data Integrity...")
     
     try:
-        conn = sqlite3.connect('products.db')
         cursor = conn.cursor()
         
         # Count records
-        cursor.execute("SELECT COUNT(*) FROM products")
-        product_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM departments")
-        dept_count = cursor.fetchone()[0]
+        cursor.execute(INTEGRITY_COUNTS_SQL)
+        product_count, dept_count, null_dept_count, linked_count = cursor.fetchone()
         
-        cursor.execute("SELECT COUNT(*) FROM products_backup")
-        backup_count = cursor.fetchone()[0]
+        # The pre-migration snapshot is a separate file; open it read-only
+        backup = sqlite3.connect('file:products.db.bak?mode=ro', uri=True)
+        backup_count = backup.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        backup.close()
         
         print(f"📈 Products: {product_count}")
         print(f"📈 Departments: {dept_count}")
         print(f"📈 Backup: {backup_count}")
         
         # Check if all products have department_id
-        cursor.execute("SELECT COUNT(*) FROM products WHERE department_id IS NULL")
-        null_dept_count = cursor.fetchone()[0]
-        
         if null_dept_count > 0:
             print(f"❌ {null_dept_count} products have NULL department_id!")
             return False
         
         # Check foreign key relationships
-        cursor.execute("""
-            SELECT COUNT(*) FROM products p
-            JOIN departments d ON p.department_id = d.id
-        """)
-        linked_count = cursor.fetchone()[0]
-        
         if linked_count != product_count:
             print(f"❌ Foreign key relationship mismatch! {linked_count} != {product_count}")
             return False
         
         print("✅ Data integrity verified!")
-        conn.close()
         return True
         
     except Exception as e:
@@ -123,18 +132,24 @@ def test_api_endpoints():
         import subprocess
         import threading
         
-        # Start server in background
+        # Start server in background; its output is discarded, since an
+        # unread pipe would block the server once the buffer fills
         server_process = subprocess.Popen(['python', 'app.py'], 
-                                        stdout=subprocess.PIPE, 
-                                        stderr=subprocess.PIPE)
+                                        stdout=subprocess.DEVNULL, 
+                                        stderr=subprocess.DEVNULL)
         
         # Wait for server to start
-        time.sleep(3)
+        wait_for_server()
         
         base_url = "http://localhost:5000"
         
+        # The endpoint checks are independent, so fetch them together over one keep-alive session
+        paths = ["/", "/api/departments", "/api/products?limit=5", "/api/products/stats"]
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            home, departments, products, stats = executor.map(session.get, [f"{base_url}{path}" for path in paths])
+        
         # Test home endpoint
-        response = requests.get(f"{base_url}/")
+        response = home
         if response.status_code == 200:
             print("✅ Home endpoint working")
         else:
@@ -142,7 +157,7 @@ def test_api_endpoints():
             return False
         
         # Test departments endpoint
-        response = requests.get(f"{base_url}/api/departments")
+        response = departments
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Departments endpoint working - {len(data['departments'])} departments")
@@ -151,7 +166,7 @@ def test_api_endpoints():
             return False
         
         # Test products endpoint with department filter
-        response = requests.get(f"{base_url}/api/products?limit=5")
+        response = products
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Products endpoint working - {len(data['products'])} products")
@@ -169,7 +184,7 @@ def test_api_endpoints():
             return False
         
         # Test stats endpoint
-        response = requests.get(f"{base_url}/api/products/stats")
+        response = stats
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Stats endpoint working - {data['total_departments']} departments")
@@ -188,36 +203,28 @@ def test_api_endpoints():
         print(f"❌ API test failed: {e}")
         return False
 
-def test_sample_queries():
+def test_sample_queries(conn):
     """Test sample queries on the new structure"""
     print("\n🔍 Testing Sample Queries...")
     
     try:
-        conn = sqlite3.connect('products.db')
         cursor = conn.cursor()
         
-        # Test 1: Get products by department
+        # Tests 1 and 2 share one grouped join: count and average price per department
         cursor.execute("""
-            SELECT d.name, COUNT(*) as count
+            SELECT d.name, COUNT(*) as count, AVG(p.retail_price) as avg_price
             FROM products p
             JOIN departments d ON p.department_id = d.id
             GROUP BY d.name
-            ORDER BY count DESC
-            LIMIT 3
         """)
-        dept_counts = cursor.fetchall()
+        dept_stats = cursor.fetchall()
+        
+        # Test 1: Get products by department
+        dept_counts = [(name, count) for name, count, _ in sorted(dept_stats, key=lambda row: row[1], reverse=True)[:3]]
         print(f"✅ Products by department: {dept_counts}")
         
         # Test 2: Get average price by department
-        cursor.execute("""
-            SELECT d.name, AVG(p.retail_price) as avg_price
-            FROM products p
-            JOIN departments d ON p.department_id = d.id
-            GROUP BY d.name
-            ORDER BY avg_price DESC
-            LIMIT 3
-        """)
-        avg_prices = cursor.fetchall()
+        avg_prices = [(name, avg_price) for name, _, avg_price in sorted(dept_stats, key=lambda row: row[2], reverse=True)[:3]]
         print(f"✅ Average price by department: {avg_prices}")
         
         # Test 3: Get products with highest profit margin
@@ -232,7 +239,6 @@ def test_sample_queries():
         profit_margins = cursor.fetchall()
         print(f"✅ Highest profit margins: {profit_margins}")
         
-        conn.close()
         print("✅ All sample queries working!")
         return True
         
@@ -240,29 +246,35 @@ def test_sample_queries():
         print(f"❌ Sample queries test failed: {e}")
         return False
 
+def run_test(test_name, test_func, *args):
+    """Run one test, reporting failures, and return whether it passed"""
+    try:
+        if test_func(*args):
+            return True
+        print(f"❌ {test_name} test failed!")
+    except Exception as e:
+        print(f"❌ {test_name} test failed with exception: {e}")
+    return False
+
 def main():
     """Run all tests"""
     print("🚀 Starting Database Refactoring Tests...\n")
     
-    tests = [
-        ("Migration", test_migration),
+    # The database checks share one read-only connection, opened once the migration has run
+    db_tests = [
         ("Database Structure", test_database_structure),
         ("Data Integrity", test_data_integrity),
-        ("Sample Queries", test_sample_queries),
-        ("API Endpoints", test_api_endpoints)
+        ("Sample Queries", test_sample_queries)
     ]
     
-    passed = 0
-    total = len(tests)
+    results = [run_test("Migration", test_migration)]
+    with ro_conn() as conn:
+        for test_name, test_func in db_tests:
+            results.append(run_test(test_name, test_func, conn))
+    results.append(run_test("API Endpoints", test_api_endpoints))
     
-    for test_name, test_func in tests:
-        try:
-            if test_func():
-                passed += 1
-            else:
-                print(f"❌ {test_name} test failed!")
-        except Exception as e:
-            print(f"❌ {test_name} test failed with exception: {e}")
+    passed = sum(results)
+    total = len(results)
     
     print(f"\n📊 Test Results: {passed}/{total} tests passed")
     